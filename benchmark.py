@@ -0,0 +1,223 @@
+"""
+Mesure les performances des chemins critiques de la simulation de buffers.
+
+Les mesures portent sur les opérations de Buffer (__add__, transmettre_paquet, buffer_plein)
+pour différentes longueurs de file, sur Source (generation_paquet, estimation_taux_arrive)
+et sur la boucle complète de MoteurSimulation pour chacun des trois modes, en faisant
+varier nb_buffer et nb_paquet. Chaque mesure donne un débit (opérations ou paquets par
+seconde), le meilleur de plusieurs répétitions, et la mémoire maximale allouée. Les états
+mesurés sont construits avec des graines fixes: deux lancements font exactement le même travail.
+
+Utilisation:
+    python benchmark.py                                  # affiche les résultats
+    python benchmark.py --enregistrer reference.json     # enregistre une référence
+    python benchmark.py --comparer reference.json        # signale les régressions
+    python benchmark.py --verifier                       # compare SimulationFragmentee à MoteurSimulation
+"""
+import argparse
+import importlib.util
+import json
+import os
+import random
+import sys
+import tracemalloc
+from time import perf_counter
+
+
+def charger_projet():
+    """
+    Importe le script de la simulation, dont le nom n'est pas un nom de module Python valide.
+    """
+    chemin = os.path.join(os.path.dirname(os.path.abspath(__file__)), "projet-prog-avancé.py")
+    spec = importlib.util.spec_from_file_location("projet", chemin)
+    projet = importlib.util.module_from_spec(spec)
+    sys.modules["projet"] = projet
+    spec.loader.exec_module(projet)
+    return projet
+
+
+def mesurer(preparer, executer, repetitions=5):
+    """
+    Mesure une fonction `repetitions` fois pour le temps, sur un nouvel état à chaque fois, puis
+    une fois (sous tracemalloc) pour la mémoire, préparation comprise. Le temps retenu est le
+    plus court: les autres ne diffèrent que par le bruit de la machine (autres processus,
+    ramasse-miettes, fréquence du processeur).
+
+    Args:
+        * preparer (callable):
+            Renvoie l'état sur lequel travaille `executer` (non chronométré).
+        * executer (callable):
+            Reçoit l'état et renvoie le nombre d'opérations effectuées.
+        * repetitions (int):
+            Nombre de mesures du temps.
+    Returns:
+        * dict:
+            Le meilleur débit ("operations_par_seconde") et la mémoire maximale allouée en octets ("memoire_max").
+    """
+    duree = float("inf")
+    for _ in range(max(1, repetitions)):
+        etat = preparer()
+        debut = perf_counter()
+        nb_operations = executer(etat)
+        duree = min(duree, perf_counter() - debut)
+
+    tracemalloc.start()
+    etat = preparer()
+    executer(etat)
+    _, memoire_max = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {"operations_par_seconde": nb_operations / duree, "memoire_max": memoire_max}
+
+
+def benchmark_buffer(projet, longueurs, nb_operations, repetitions=5):
+    resultats = {}
+    for longueur in longueurs:
+        def preparer(longueur=longueur):
+            rng = random.Random(0)
+            buffer = projet.Buffer(10 * longueur + 10)
+            for _ in range(longueur):
+                buffer += projet.Paquet(rng.randint(1, 5))
+            return buffer
+
+        def ajout_transmission(buffer):
+            # La file garde la même longueur: un ajout suivi d'une transmission.
+            paquet = projet.Paquet(3)
+            for _ in range(nb_operations):
+                buffer += paquet
+                buffer.transmettre_paquet()
+            return 2 * nb_operations
+
+        def plein(buffer):
+            paquet = projet.Paquet(3)
+            for _ in range(nb_operations):
+                buffer.buffer_plein(paquet)
+            return nb_operations
+
+        resultats[f"buffer.ajout_transmission.{longueur}"] = mesurer(preparer, ajout_transmission, repetitions)
+        resultats[f"buffer.buffer_plein.{longueur}"] = mesurer(preparer, plein, repetitions)
+    return resultats
+
+
+def benchmark_source(projet, nb_operations, repetitions=5):
+    def preparer():
+        return projet.Source(2, 10, graine=0)
+
+    def generation(source):
+        for _ in range(nb_operations):
+            source.generation_paquet()
+        return nb_operations
+
+    def estimation(source):
+        for _ in range(nb_operations):
+            source.estimation_taux_arrive()
+        return nb_operations
+
+    return {
+        "source.generation_paquet": mesurer(preparer, generation, repetitions),
+        "source.estimation_taux_arrive": mesurer(preparer, estimation, repetitions),
+    }
+
+
+def benchmark_simulation(projet, nb_buffers, nb_paquets, repetitions=5):
+    resultats = {}
+    parametre = dict(projet.PARAMETRE_DEFAUT, lambda_param=2, taille_max_paquet=5, capacite_buffer=200,
+                     capacite_sous_buffer=40)
+    for mode in projet.MODES:
+        for nb_buffer in nb_buffers:
+            for nb_paquet in nb_paquets:
+                def preparer(nb_buffer=nb_buffer, nb_paquet=nb_paquet, mode=mode):
+                    sources, buffers, buffer = projet.creer_composants(parametre, nb_buffer, graine=0)
+                    return projet.MoteurSimulation(sources, buffers, nb_buffer, nb_paquet, buffer, mode, graine=0)
+
+                def executer(moteur):
+                    return moteur.run()["nb_paquet_genere"]
+
+                resultats[f"simulation.{mode}.{nb_buffer}.{nb_paquet}"] = mesurer(preparer, executer, repetitions)
+    return resultats
+
+
+def comparer(resultats, reference, tolerance):
+    """
+    Renvoie la liste des régressions: débit plus faible ou mémoire plus grande que la
+    référence au-delà de la tolérance relative.
+    """
+    regressions = []
+    for nom, mesure in resultats.items():
+        if nom not in reference:
+            continue
+        ancien = reference[nom]
+        if mesure["operations_par_seconde"] < ancien["operations_par_seconde"] * (1 - tolerance):
+            regressions.append(f"{nom}: débit {mesure['operations_par_seconde']:.0f}/s au lieu de {ancien['operations_par_seconde']:.0f}/s")
+        if mesure["memoire_max"] > ancien["memoire_max"] * (1 + tolerance):
+            regressions.append(f"{nom}: mémoire {mesure['memoire_max']} octets au lieu de {ancien['memoire_max']}")
+    return regressions
+
+
+def verifier_fragmentation(projet, ecart_max=2.0):
+    """
+    Vérifie que SimulationFragmentee donne, aux fluctuations près, le même taux de perte qu'une
+    simulation en un seul processus, y compris quand le buffer principal est petit devant
+    le débit de transmission.
+
+    Returns:
+        * list:
+            Les configurations dont les taux de perte diffèrent de plus de `ecart_max` points.
+    """
+    echecs = []
+    configurations = [
+        dict(capacite_buffer=20, taux_transmission=60, lambda_param=1, capacite_sous_buffer=10, taille_max_paquet=1),
+        dict(capacite_buffer=20, taux_transmission=60, lambda_param=2, capacite_sous_buffer=10, taille_max_paquet=3),
+        dict(capacite_buffer=400, taux_transmission=60, lambda_param=1, capacite_sous_buffer=10, taille_max_paquet=1),
+    ]
+    for configuration in configurations:
+        parametre = dict(projet.PARAMETRE_DEFAUT, nb_buffer=64, nb_paquet=300, **configuration)
+        for mode in projet.MODES:
+            sources, buffers, buffer = projet.creer_composants(parametre, 64, graine=7)
+            mono = projet.MoteurSimulation(sources, buffers, parametre["taux_transmission"], parametre["nb_paquet"], buffer, mode, graine=7).run()
+            fragmentee = projet.SimulationFragmentee(parametre, mode, nb_fragments=4, graine=7).run()
+            ecart = fragmentee["pourcentage_perte"] - mono["pourcentage_perte"]
+            print(f"{mode:16} {configuration} perte {mono['pourcentage_perte']:.1f}% / {fragmentee['pourcentage_perte']:.1f}%")
+            if abs(ecart) > ecart_max:
+                echecs.append(f"{mode} {configuration}: écart de {ecart:+.1f} points")
+    return echecs
+
+
+def main(arguments=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--enregistrer", metavar="JSON", help="fichier où enregistrer les résultats comme référence")
+    parser.add_argument("--comparer", metavar="JSON", help="fichier de référence avec lequel comparer les résultats")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="écart relatif toléré avant de signaler une régression")
+    parser.add_argument("--rapide", action="store_true", help="mesures plus courtes, moins précises")
+    parser.add_argument("--repetitions", type=int, default=5, help="nombre de mesures du temps dont on garde la meilleure")
+    parser.add_argument("--verifier", action="store_true", help="vérifie seulement que la simulation fragmentée concorde avec un seul processus")
+    args = parser.parse_args(arguments)
+
+    projet = charger_projet()
+    if args.verifier:
+        echecs = verifier_fragmentation(projet)
+        for echec in echecs:
+            print(f"ÉCHEC {echec}")
+        return 1 if echecs else 0
+    nb_operations = 20_000 if args.rapide else 200_000
+    resultats = {}
+    resultats.update(benchmark_buffer(projet, [10, 1_000, 100_000], nb_operations, args.repetitions))
+    resultats.update(benchmark_source(projet, nb_operations, args.repetitions))
+    resultats.update(benchmark_simulation(projet, [1, 10, 100], [1_000] if args.rapide else [1_000, 10_000], args.repetitions))
+
+    for nom, mesure in resultats.items():
+        print(f"{nom:45} {mesure['operations_par_seconde']:>14,.0f}/s {mesure['memoire_max'] / 1024:>10,.0f} Kio")
+
+    if args.enregistrer:
+        with open(args.enregistrer, "w") as fichier:
+            json.dump(resultats, fichier, indent=2)
+    if args.comparer:
+        with open(args.comparer) as fichier:
+            regressions = comparer(resultats, json.load(fichier), args.tolerance)
+        for regression in regressions:
+            print(f"RÉGRESSION {regression}")
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
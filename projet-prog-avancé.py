@@ -1,8 +1,133 @@
-from random import randint, expovariate
-import tkinter as tk
-from tkinter import ttk
-from time import sleep
-from threading import Thread
+from math import ceil, log
+from bisect import bisect_right
+from itertools import product
+import argparse
+import hashlib
+import json
+import os
+import sys
+import random
+import csv
+import mmap
+import struct
+import weakref
+import pickle
+import zlib
+from heapq import heapify, heappush, heappop
+from collections import deque
+from array import array
+from time import perf_counter, perf_counter_ns
+from statistics import NormalDist
+from queue import Queue, Empty, Full
+from threading import Thread, get_ident
+
+
+PARAMETRE_DEFAUT = {
+    "lambda_param": 1,
+    "taille_max_paquet": 1,
+    "capacite_buffer": 1,
+    "taux_transmission": 1,
+    "nb_buffer": 1,
+    "nb_paquet": 50,
+    "capacite_sous_buffer": 1,
+    "precision": 0
+}
+MODES = ["chacun son tour", "aléatoire", "la plus pleine"]
+# À incrémenter à chaque modification du moteur qui change les résultats obtenus avec une graine
+# donnée: les résultats mis en cache par les versions précédentes (CacheResultats) sont alors ignorés.
+VERSION_MOTEUR = 1
+# Tkinter n'est importé qu'en mode graphique (voir charger_tkinter): le mode sans interface
+# démarre plus vite et tourne sur des machines sans affichage.
+tk = ttk = filedialog = None
+
+
+def charger_tkinter():
+    global tk, ttk, filedialog
+    import tkinter as tk
+    from tkinter import ttk, filedialog
+
+
+class FileCompacte:
+    """
+    File d'attente FIFO compacte utilisée par Buffer en mode compact.
+
+    Au lieu de garder un objet Paquet par paquet, seules les tailles sont stockées dans
+    un tableau typé (array('I')) utilisé comme tampon circulaire, dont la taille double
+    lorsqu'il est plein. Les objets Paquet ne sont recréés qu'à la lecture, ce qui permet
+    de garder des millions de paquets en mémoire pour 4 octets chacun.
+
+    Attributs:
+        * tailles (array):
+            Tampon circulaire des tailles de paquets.
+        * debut (int):
+            Position du premier paquet dans le tampon.
+        * longueur (int):
+            Nombre de paquets présents dans la file.
+
+    Méthodes:
+        * append(paquet) -> None:
+            Ajoute un paquet en fin de file.
+        * popleft() -> Paquet:
+            Retire et renvoie le premier paquet de la file.
+        * remove(paquet) -> None:
+            Retire le premier paquet de même taille que `paquet` (ValueError s'il n'y en a pas).
+    """
+    def __init__(self, capacite_initiale=16):
+        self.tailles = array("I", bytes(4 * capacite_initiale))
+        self.debut = 0
+        self.longueur = 0
+
+    def __len__(self):
+        return self.longueur
+
+    def _position(self, i):
+        if i < 0:
+            i += self.longueur
+        if not 0 <= i < self.longueur:
+            raise IndexError("indice hors de la file")
+        return (self.debut + i) % len(self.tailles)
+
+    def __getitem__(self, i):
+        return Paquet(self.tailles[self._position(i)])
+
+    def __iter__(self):
+        for i in range(self.longueur):
+            yield Paquet(self.tailles[(self.debut + i) % len(self.tailles)])
+
+    def __contains__(self, paquet):
+        return any(p.taille == paquet.taille for p in self)
+
+    def _agrandir(self):
+        # On remet les paquets dans l'ordre au début d'un tampon deux fois plus grand.
+        ancien = self.tailles
+        self.tailles = array("I", bytes(8 * len(ancien)))
+        for i in range(self.longueur):
+            self.tailles[i] = ancien[(self.debut + i) % len(ancien)]
+        self.debut = 0
+
+    def append(self, paquet):
+        if self.longueur == len(self.tailles):
+            self._agrandir()
+        self.tailles[(self.debut + self.longueur) % len(self.tailles)] = paquet.taille
+        self.longueur += 1
+
+    def popleft(self):
+        if not self.longueur:
+            raise IndexError("file vide")
+        taille = self.tailles[self.debut]
+        self.debut = (self.debut + 1) % len(self.tailles)
+        self.longueur -= 1
+        return Paquet(taille)
+
+    def remove(self, paquet):
+        for i in range(self.longueur):
+            if self.tailles[self._position(i)] == paquet.taille:
+                # Décale d'une case vers l'avant les paquets situés après celui retiré.
+                for j in range(i, self.longueur - 1):
+                    self.tailles[self._position(j)] = self.tailles[self._position(j + 1)]
+                self.longueur -= 1
+                return
+        raise ValueError("paquet absent de la file")
 
 
 class Buffer:
@@ -13,15 +138,24 @@ class Buffer:
     Elle offre des fonctionnalités pour ajouter, retirer et transmettre des paquets,
     ainsi que pour vérifier l'état de la file d'attente.
 
+    L'occupation (somme des tailles des paquets) est tenue à jour à chaque ajout et retrait,
+    et la file est une deque: l'ajout, la transmission et le calcul du remplissage sont en O(1).
+
     Args:
         * C (int):
             La capacité maximale de la file d'attente.
+        * compact (bool):
+            Si True, la file stocke uniquement les tailles des paquets dans un tableau typé
+            (voir FileCompacte). Les paquets transmis sont alors de nouveaux objets Paquet
+            de même taille.
 
     Attributs:
         * capacite (int):
             La capacité maximale de la file d'attente, en unités de taille de paquet.
-        * file_attente (list):
-            Une liste contenant les paquets actuellement stockés dans la file d'attente.
+        * file_attente (deque ou FileCompacte):
+            La file contenant les paquets actuellement stockés dans la file d'attente.
+        * occupation (int):
+            La somme des tailles des paquets présents dans la file d'attente.
 
     Méthodes:
         * buffer_plein(self, nouveau_paquet) -> bool:
@@ -60,47 +194,77 @@ class Buffer:
                 * float:
                     Le pourcentage de remplissage du tampon (0 si le tampon est vide).
     """
-    def __init__(self, C):
+    def __init__(self, C, compact=False):
         self.capacite = C
-        self.file_attente = []
+        self.file_attente = FileCompacte() if compact else deque()
+        self.occupation = 0
 
     def buffer_plein(self, nouveau_paquet):
-        return (sum(paquet.taille for paquet in self.file_attente) + nouveau_paquet.taille) > self.capacite
+        return (self.occupation + nouveau_paquet.taille) > self.capacite
 
     def __add__(self, nouveau_paquet):
         if not self.buffer_plein(nouveau_paquet):
             self.file_attente.append(nouveau_paquet)
+            self.occupation += nouveau_paquet.taille
         return self
 
     def __sub__(self, paquet):
-        if paquet in self.file_attente:
+        if self.file_attente and self.file_attente[0] is paquet:
+            # Cas courant: le paquet retiré est le premier de la file.
+            self.file_attente.popleft()
+        elif paquet in self.file_attente:
             self.file_attente.remove(paquet)
-            return self, paquet
-        return self, None
+        else:
+            return self, None
+        self.occupation -= paquet.taille
+        return self, paquet
 
     def transmettre_paquet(self):
         if self.file_attente:
-            paquet_a_transmettre = self.file_attente[0]
-            self - paquet_a_transmettre
+            paquet_a_transmettre = self.file_attente.popleft()
+            self.occupation -= paquet_a_transmettre.taille
             return paquet_a_transmettre, self
         return None, self
 
     def pourcentage_rempli(self):
         if self.file_attente:
-            return (sum(paquet.taille for paquet in self.file_attente) / self.capacite) * 100
+            return (self.occupation / self.capacite) * 100
         else:
             return 0
 
+    def __getstate__(self):
+        # Seules les tailles des paquets sont sauvegardées, dans un tableau typé.
+        return {
+            "capacite": self.capacite,
+            "compact": isinstance(self.file_attente, FileCompacte),
+            "tailles": array("I", (paquet.taille for paquet in self.file_attente)),
+        }
+
+    def __setstate__(self, etat):
+        self.__init__(etat["capacite"], etat["compact"])
+        for taille in etat["tailles"]:
+            self.file_attente.append(Paquet(taille))
+            self.occupation += taille
+
 
 class Source:
     """
     Classe représentant une source de paquets dans un réseau.
 
+    Chaque source a son propre générateur aléatoire: les tailles et les délais entre deux
+    arrivées sont tirés par blocs de `taille_bloc` valeurs, rangés dans des tableaux typés,
+    et chaque nouveau paquet se contente de lire la valeur suivante. Un bloc n'est tiré
+    que lorsque le précédent est épuisé.
+
     Args:
         * lambda_param (float): 
             Paramètre de la loi exponentielle qui détermine le taux d'arrivée des paquets.
         * taille_max_paquet (int):
             Taille maximale des paquets générés.
+        * graine (int ou str):
+            Graine du générateur aléatoire de la source (None pour une graine imprévisible).
+        * taille_bloc (int):
+            Nombre de valeurs tirées à la fois.
     Attributs:
         * lambda_param (float):
             Paramètre de la loi exponentielle qui détermine le taux d'arrivée des paquets.
@@ -110,13 +274,20 @@ class Source:
             Nombre de paquets générés par la source.
         * nb_paquet_perdu (int):
             Nombre de paquets perdus par la source.
+        * rng (random.Random):
+            Le générateur aléatoire propre à la source.
 
     Méthodes:
-        * generation_paquet() -> Paquet:
+        * generation_paquet(taille=None) -> Paquet:
             Génère un nouveau paquet et incrémente le nombre de paquets générés.
+            Args:
+                * taille (int):
+                    Taille imposée du paquet (par exemple lue dans une trace).
             Return:
                 * Objet:
-                    un objet paquet de taille aléatoire de 1 à self.taille_max_paquet
+                    un objet paquet de taille `taille`, ou aléatoire de 1 à self.taille_max_paquet si elle vaut None
+        * delai_arrivee() -> float:
+            Renvoie le délai avant la prochaine arrivée, tiré selon une loi exponentielle de paramètre lambda_param.
         * estimation_taux_arrive() -> float:
             Estime le taux d'arrivée des paquets en utilisant la loi exponentielle.
             Returns:
@@ -124,18 +295,47 @@ class Source:
                     Le taux d'arrivée estimé.
     """
 
-    def __init__(self, lambda_param, taille_max_paquet):
+    def __init__(self, lambda_param, taille_max_paquet, graine=None, taille_bloc=256):
         self.lambda_param = lambda_param
         self.taille_max_paquet = taille_max_paquet
         self.nb_paquet_genere = 0
         self.nb_paquet_perdu = 0
-
-    def generation_paquet(self):
+        self.rng = random.Random(graine)
+        self.taille_bloc = taille_bloc
+        self._tailles = array("I")
+        self._indice_taille = 0
+        self._delais = array("d")
+        self._indice_delai = 0
+
+    def _tirer_tailles(self):
+        self._tailles = array("I", self.rng.choices(range(1, int(self.taille_max_paquet) + 1), k=self.taille_bloc))
+        self._indice_taille = 0
+
+    def _tirer_delais(self):
+        # Même calcul que random.expovariate, sans un appel de méthode par valeur.
+        aleatoire = self.rng.random
+        lambda_param = self.lambda_param
+        self._delais = array("d", [-log(1.0 - aleatoire()) / lambda_param for _ in range(self.taille_bloc)])
+        self._indice_delai = 0
+
+    def generation_paquet(self, taille=None):
         self.nb_paquet_genere += 1
-        return Paquet(randint(1, self.taille_max_paquet))
+        if taille is None:
+            if self._indice_taille == len(self._tailles):
+                self._tirer_tailles()
+            taille = self._tailles[self._indice_taille]
+            self._indice_taille += 1
+        return Paquet(taille)
+
+    def delai_arrivee(self):
+        if self._indice_delai == len(self._delais):
+            self._tirer_delais()
+        delai = self._delais[self._indice_delai]
+        self._indice_delai += 1
+        return delai
 
     def estimation_taux_arrive(self):
-        return 1 / expovariate(self.lambda_param)
+        return 1 / self.delai_arrivee()
 
 
 class Paquet:
@@ -147,10 +347,2247 @@ class Paquet:
     Attributs:
         * taille (int): Taille du paquet en octets.
     """
+    __slots__ = ("taille",)
+
     def __init__(self, taille):
         self.taille = taille
 
 
+class TasMaxIndexe:
+    """
+    Tas binaire max indexé, utilisé pour le mode "la plus pleine".
+
+    Chaque élément est identifié par son indice (celui du sous-buffer) et possède une
+    valeur (son pourcentage de remplissage). Le tableau `position` permet de retrouver
+    un élément dans le tas et de le remettre à sa place en O(log N) quand sa valeur change.
+    À valeur égale, le plus petit indice l'emporte, comme avec max() sur la liste des buffers.
+
+    Args:
+        * valeurs (list):
+            Les valeurs initiales, l'élément i ayant la valeur valeurs[i].
+
+    Méthodes:
+        * maximum() -> int:
+            Renvoie en O(1) l'indice de l'élément de plus grande valeur.
+        * mettre_a_jour(indice, valeur) -> None:
+            Change la valeur de l'élément `indice` et rétablit l'ordre du tas en O(log N).
+    """
+    def __init__(self, valeurs):
+        self.cles = [(valeur, -i) for i, valeur in enumerate(valeurs)]
+        self.tas = list(range(len(valeurs)))
+        self.position = list(range(len(valeurs)))
+        for k in reversed(range(len(self.tas) // 2)):
+            self._descendre(k)
+
+    def __len__(self):
+        return len(self.tas)
+
+    def _echanger(self, a, b):
+        self.tas[a], self.tas[b] = self.tas[b], self.tas[a]
+        self.position[self.tas[a]] = a
+        self.position[self.tas[b]] = b
+
+    def _monter(self, k):
+        while k > 0:
+            parent = (k - 1) // 2
+            if self.cles[self.tas[k]] <= self.cles[self.tas[parent]]:
+                break
+            self._echanger(k, parent)
+            k = parent
+
+    def _descendre(self, k):
+        n = len(self.tas)
+        while True:
+            plus_grand = k
+            for enfant in (2 * k + 1, 2 * k + 2):
+                if enfant < n and self.cles[self.tas[enfant]] > self.cles[self.tas[plus_grand]]:
+                    plus_grand = enfant
+            if plus_grand == k:
+                return
+            self._echanger(k, plus_grand)
+            k = plus_grand
+
+    def maximum(self):
+        return self.tas[0]
+
+    def mettre_a_jour(self, indice, valeur):
+        ancienne = self.cles[indice]
+        self.cles[indice] = (valeur, -indice)
+        if self.cles[indice] > ancienne:
+            self._monter(self.position[indice])
+        elif self.cles[indice] < ancienne:
+            self._descendre(self.position[indice])
+
+
+class LecteurTrace:
+    """
+    Lecteur d'un fichier de trace binaire de paquets, projeté en mémoire (mmap).
+
+    Le fichier commence par un en-tête de 16 octets (la signature b"TRACEBUF" puis le nombre
+    d'enregistrements sur 8 octets), suivi d'enregistrements de 16 octets au format
+    FORMAT: date d'arrivée (float64), numéro de source (uint32) et taille du paquet (uint32),
+    en petit-boutiste et triés par date. Les enregistrements sont lus directement dans la
+    projection mémoire, par blocs, sans copier le fichier: la mémoire utilisée ne dépend pas
+    de la longueur de la trace.
+
+    Args:
+        * chemin (str):
+            Chemin du fichier de trace (voir convertir_csv_en_trace).
+        * taille_bloc (int):
+            Nombre d'enregistrements par bloc.
+
+    Méthodes:
+        * blocs() -> générateur:
+            Renvoie les blocs d'enregistrements sous forme de memoryview sur la projection.
+        * __iter__() -> générateur:
+            Renvoie les enregistrements un par un, sous forme de tuples (date, source, taille).
+        * fermer() -> None:
+            Arrête les lectures en cours puis ferme la projection et le fichier (aussi appelée
+            en sortie de bloc with).
+    """
+    SIGNATURE = b"TRACEBUF"
+    ENTETE = struct.Struct("<8sQ")
+    FORMAT = struct.Struct("<dII")
+
+    def __init__(self, chemin, taille_bloc=65536):
+        self.taille_bloc = taille_bloc
+        self._lectures = weakref.WeakSet()
+        self.fichier = open(chemin, "rb")
+        try:
+            # Un fichier vide ne peut pas être projeté et un fichier tronqué n'a pas d'en-tête complet.
+            if os.fstat(self.fichier.fileno()).st_size < self.ENTETE.size:
+                raise ValueError(f"{chemin} n'est pas un fichier de trace")
+            self.memoire = mmap.mmap(self.fichier.fileno(), 0, access=mmap.ACCESS_READ)
+        except BaseException:
+            self.fichier.close()
+            raise
+        signature, self.nb_enregistrements = self.ENTETE.unpack_from(self.memoire)
+        if signature != self.SIGNATURE:
+            self.fermer()
+            raise ValueError(f"{chemin} n'est pas un fichier de trace")
+        if len(self.memoire) < self.ENTETE.size + self.nb_enregistrements * self.FORMAT.size:
+            self.fermer()
+            raise ValueError(f"{chemin} est tronqué: {self.nb_enregistrements} enregistrements annoncés")
+
+    def __len__(self):
+        return self.nb_enregistrements
+
+    def _blocs(self):
+        taille = self.FORMAT.size
+        fin = self.ENTETE.size + self.nb_enregistrements * taille
+        vue = memoryview(self.memoire)
+        for debut in range(self.ENTETE.size, fin, self.taille_bloc * taille):
+            yield vue[debut:min(fin, debut + self.taille_bloc * taille)]
+
+    def _enregistrements(self):
+        for bloc in self.blocs():
+            yield from self.FORMAT.iter_unpack(bloc)
+
+    def blocs(self):
+        lecture = self._blocs()
+        self._lectures.add(lecture)
+        return lecture
+
+    def __iter__(self):
+        lecture = self._enregistrements()
+        self._lectures.add(lecture)
+        return lecture
+
+    def fermer(self):
+        # Les lectures en cours gardent des vues sur la projection: on les arrête avant de la fermer.
+        for lecture in list(self._lectures):
+            lecture.close()
+        self.memoire.close()
+        self.fichier.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.fermer()
+
+
+def convertir_csv_en_trace(chemin_csv, chemin_trace, taille_bloc=65536, nb_sources=None):
+    """
+    Convertit une trace CSV (date, numéro de source, taille par ligne, déjà triées par date)
+    au format binaire lu par LecteurTrace. Une première ligne non numérique est prise pour
+    un en-tête et ignorée. La conversion se fait par blocs, sans charger tout le fichier.
+    Un numéro de source négatif (ou au moins égal à nb_sources) lève une ValueError.
+
+    Args:
+        * chemin_csv (str):
+            Le fichier CSV à convertir.
+        * chemin_trace (str):
+            Le fichier binaire à écrire.
+        * taille_bloc (int):
+            Nombre d'enregistrements écrits à la fois.
+        * nb_sources (int):
+            Nombre de sources de la simulation qui rejouera la trace (None pour ne pas le vérifier).
+    Returns:
+        * int:
+            Le nombre d'enregistrements écrits.
+    """
+    nb_enregistrements = 0
+    with open(chemin_csv, newline="") as entree, open(chemin_trace, "wb") as sortie:
+        sortie.write(LecteurTrace.ENTETE.pack(LecteurTrace.SIGNATURE, 0))
+        bloc = bytearray()
+        for numero, ligne in enumerate(csv.reader(entree), 1):
+            if not ligne:
+                continue
+            try:
+                date, source, taille = float(ligne[0]), int(ligne[1]), int(ligne[2])
+            except ValueError:
+                if nb_enregistrements == 0 and not bloc:
+                    continue
+                raise
+            if source < 0 or (nb_sources is not None and source >= nb_sources):
+                raise ValueError(f"{chemin_csv}, ligne {numero}: numéro de source {source} invalide")
+            bloc += LecteurTrace.FORMAT.pack(date, source, taille)
+            nb_enregistrements += 1
+            if nb_enregistrements % taille_bloc == 0:
+                sortie.write(bloc)
+                bloc.clear()
+        sortie.write(bloc)
+        sortie.seek(0)
+        sortie.write(LecteurTrace.ENTETE.pack(LecteurTrace.SIGNATURE, nb_enregistrements))
+    return nb_enregistrements
+
+
+class MoteurSimulation:
+    """
+    Moteur de simulation à événements discrets, indépendant de Tkinter.
+
+    Le moteur avance en temps simulé à l'aide d'un calendrier d'événements (un tas
+    de tuples (date, numéro, type, indice)). Il réutilise les objets Source, Buffer
+    et Paquet ainsi que les trois modes de répartition de l'interface, mais sans
+    aucun appel à sleep ni à l'interface: il tourne aussi vite que le processeur le permet.
+
+    Trois types d'événements sont gérés:
+        - ARRIVEE: la source d'indice i génère un paquet qui entre dans son sous-buffer
+          (ou est perdu si celui-ci est plein). La prochaine arrivée est tirée selon
+          une loi exponentielle de paramètre source.lambda_param.
+        - TRANSFERT: un sous-buffer choisi selon le mode cède son premier paquet au
+          buffer principal s'il y a la place. Il y a un transfert par source et
+          par unité de temps.
+        - TRANSMISSION: le buffer principal transmet son premier paquet, toutes les
+          1 / taux_transmission unités de temps.
+
+    Args:
+        * sources (list):
+            Liste des objets Source, une par sous-buffer.
+        * buffers (list):
+            Liste des sous-buffers.
+        * taux_transmission (float):
+            Nombre de paquets transmis par le buffer principal par unité de temps (0 pour aucun).
+        * nb_paquet (int):
+            Nombre moyen de paquets à générer par source (la simulation s'arrête après
+            nb_paquet * len(sources) arrivées).
+        * buffer (Buffer):
+            Le buffer principal.
+        * mode (str):
+            "chacun son tour", "aléatoire" ou "la plus pleine".
+        * trace (iterable):
+            Si elle est donnée, les arrivées ne sont plus tirées au hasard mais lues dans cette
+            suite de tuples (date, numéro de source, taille), triés par date (par exemple un
+            LecteurTrace). La simulation s'arrête à la fin de la trace ou après nb_paquet * len(sources)
+            arrivées. Un numéro de source hors de range(len(sources)) lève une ValueError.
+        * graine (int ou str):
+            Graine du générateur utilisé par le mode "aléatoire" (None pour une graine imprévisible).
+            Les arrivées sont tirées par les générateurs propres aux sources.
+
+    Attributs:
+        * temps (float):
+            Date simulée courante.
+        * conter (int):
+            Nombre de paquets générés depuis le début de la simulation.
+        * nb_paquet_perdu (int):
+            Nombre de paquets perdus depuis le début de la simulation, toutes sources confondues.
+        * nb_transmis (int):
+            Nombre de paquets transmis par le buffer principal.
+        * nb_transferts (int):
+            Nombre de paquets passés d'un sous-buffer au buffer principal.
+        * dernier_transfert (int):
+            Indice du sous-buffer du dernier transfert (None s'il n'y en a pas encore eu).
+        * aire_remplissage (float):
+            Intégrale du pourcentage de remplissage du buffer principal sur le temps simulé.
+        * intervalle_confiance (dict):
+            Le dernier intervalle de confiance calculé par un ArretPrecision abonné (None sinon).
+        * calendrier (list):
+            Tas des événements à venir.
+        * remplissage (TasMaxIndexe):
+            Remplissage des sous-buffers, tenu à jour à chaque ajout et retrait.
+        * rng (random.Random):
+            Le générateur aléatoire du mode "aléatoire".
+        * observateurs (list):
+            Liste de couples (fonction, période) appelés au fil de la simulation.
+
+    Méthodes:
+        * abonner(observateur, periode=1) -> None:
+            Enregistre une fonction appelée avec le moteur toutes les `periode` arrivées.
+        * selection_buffer() -> int:
+            Renvoie l'indice du sous-buffer choisi selon le mode courant.
+        * etape() -> bool:
+            Traite le prochain événement du calendrier. Renvoie False si la simulation est finie.
+        * run() -> dict:
+            Exécute la simulation jusqu'au bout et renvoie les résultats.
+        * executer_jusqu_a(date) -> None:
+            Traite les événements antérieurs à `date`.
+        * resultats() -> dict:
+            Renvoie les compteurs de la simulation (paquets générés, perdus, taux de perte...).
+        * instantane() -> dict:
+            Renvoie un état compact de la simulation destiné à l'affichage.
+        * sauvegarder(chemin) -> None:
+            Enregistre tout l'état de la simulation (files, compteurs, générateurs aléatoires,
+            calendrier) dans un fichier binaire compressé. Les observateurs et l'instrumentation d'un
+            Profileur ne sont pas sauvegardés, et une simulation qui rejoue une trace ne peut pas l'être.
+        * charger(chemin) -> MoteurSimulation:
+            Méthode de classe: recrée un moteur à partir d'une sauvegarde, prêt à reprendre
+            (à n'utiliser que sur des fichiers de confiance, le format reposant sur pickle).
+        * variante(taux_transmission=None, mode=None, nb_paquet=None, graine=None) -> MoteurSimulation:
+            Renvoie une copie indépendante du moteur dans son état courant, avec éventuellement un
+            autre taux de transmission, un autre mode, nb_paquet paquets par source de plus à simuler
+            ou de nouveaux générateurs aléatoires.
+        * stop() -> None:
+            Arrête la simulation.
+    """
+    SIGNATURE = b"SIMBUF01"
+    ARRIVEE, TRANSFERT, TRANSMISSION = 0, 1, 2
+
+    def __init__(self, sources, buffers, taux_transmission, nb_paquet, buffer, mode, trace=None, graine=None):
+        self.sources = sources
+        self.buffers = buffers
+        self.buffer = buffer
+        self.taux_transmission = taux_transmission
+        self.nb_paquet = int(nb_paquet)
+        self.mode = mode
+        self.nb_arrivees_max = self.nb_paquet * len(sources)
+        self.temps = 0.0
+        self.conter = 0
+        self.nb_paquet_perdu = 0
+        self.nb_transmis = 0
+        self.nb_transferts = 0
+        self.dernier_transfert = None
+        self.aire_remplissage = 0.0
+        self.intervalle_confiance = None
+        self.running = True
+        self.calendrier = []
+        self.observateurs = []
+        self._numero = 0
+        self._tour = 0
+        self.trace = iter(trace) if trace is not None else None
+        self.rng = random.Random(None if graine is None else f"{graine}:repartition")
+        self._taille_trace = None
+        self.remplissage = TasMaxIndexe([buffer.pourcentage_rempli() for buffer in buffers])
+        self._initialiser()
+
+    def _planifier(self, date, type_evenement, indice=-1):
+        # Le numéro départage deux événements de même date sans comparer les types.
+        self._numero += 1
+        heappush(self.calendrier, (date, self._numero, type_evenement, indice))
+
+    def _initialiser(self):
+        if self.trace is not None:
+            if not self._planifier_trace():
+                # Trace vide: aucune arrivée ne viendra arrêter la simulation.
+                self.stop()
+        else:
+            for i, source in enumerate(self.sources):
+                self._planifier(source.delai_arrivee(), self.ARRIVEE, i)
+        if self.buffers:
+            self._planifier(1 / len(self.buffers), self.TRANSFERT)
+        if self.taux_transmission:
+            self._planifier(1 / self.taux_transmission, self.TRANSMISSION)
+        if not self.sources or self.nb_arrivees_max == 0:
+            # Rien à simuler: sans arrivée, les transferts et transmissions tourneraient sans fin.
+            self.stop()
+
+    def _planifier_trace(self):
+        # Une seule arrivée de la trace est dans le calendrier à la fois: sa taille est gardée à part.
+        enregistrement = next(self.trace, None)
+        if enregistrement is None:
+            return False
+        date, indice, self._taille_trace = enregistrement
+        if not 0 <= indice < len(self.sources):
+            raise ValueError(f"la trace désigne la source {indice}, mais la simulation n'en a que {len(self.sources)}")
+        self._planifier(max(date, self.temps), self.ARRIVEE, indice)
+        return True
+
+    def abonner(self, observateur, periode=1):
+        self.observateurs.append((observateur, max(1, int(periode))))
+
+    def selection_buffer(self):
+        if self.mode == "aléatoire":
+            return self.rng.randrange(len(self.buffers))
+        if self.mode == "la plus pleine":
+            return self.remplissage.maximum()
+        indice = self._tour
+        self._tour = (self._tour + 1) % len(self.buffers)
+        return indice
+
+    def _arrivee(self, i):
+        source = self.sources[i]
+        buffer = self.buffers[i]
+        paquet = source.generation_paquet(self._taille_trace)
+        if buffer.buffer_plein(paquet):
+            source.nb_paquet_perdu += 1
+            self.nb_paquet_perdu += 1
+        else:
+            buffer += paquet
+            self.remplissage.mettre_a_jour(i, buffer.pourcentage_rempli())
+        self.conter += 1
+        if self.trace is None:
+            self._planifier(self.temps + source.delai_arrivee(), self.ARRIVEE, i)
+        elif not self._planifier_trace():
+            self.stop()
+        for observateur, periode in self.observateurs:
+            if self.conter % periode == 0:
+                observateur(self)
+        if self.conter >= self.nb_arrivees_max:
+            self.stop()
+
+    def _transfert(self):
+        indice = self.selection_buffer()
+        buffer = self.buffers[indice]
+        if buffer.file_attente and not self.buffer.buffer_plein(buffer.file_attente[0]):
+            paquet_transmit, _ = buffer.transmettre_paquet()
+            self.buffer += paquet_transmit
+            self.remplissage.mettre_a_jour(indice, buffer.pourcentage_rempli())
+            self.nb_transferts += 1
+            self.dernier_transfert = indice
+        self._planifier(self.temps + 1 / len(self.buffers), self.TRANSFERT)
+
+    def _transmission(self):
+        paquet, _ = self.buffer.transmettre_paquet()
+        if paquet is not None:
+            self.nb_transmis += 1
+        self._planifier(self.temps + 1 / self.taux_transmission, self.TRANSMISSION)
+
+    def etape(self):
+        if not self.running or not self.calendrier:
+            return False
+        date, _, type_evenement, indice = heappop(self.calendrier)
+        self.aire_remplissage += self.buffer.pourcentage_rempli() * (date - self.temps)
+        self.temps = date
+        if type_evenement == self.ARRIVEE:
+            self._arrivee(indice)
+        elif type_evenement == self.TRANSFERT:
+            self._transfert()
+        else:
+            self._transmission()
+        return self.running
+
+    def run(self):
+        while self.etape():
+            pass
+        return self.resultats()
+
+    def executer_jusqu_a(self, date):
+        while self.running and self.calendrier and self.calendrier[0][0] < date:
+            self.etape()
+
+    def resultats(self):
+        nb_paquet_genere = self.conter
+        nb_paquet_perdu = self.nb_paquet_perdu
+        return {
+            "temps": self.temps,
+            "nb_paquet_genere": nb_paquet_genere,
+            "nb_paquet_perdu": nb_paquet_perdu,
+            "nb_transmis": self.nb_transmis,
+            "pourcentage_perte": nb_paquet_perdu / nb_paquet_genere * 100 if nb_paquet_genere != 0 else 0,
+            "pourcentage_buffer": self.buffer.pourcentage_rempli(),
+            "remplissage_moyen": self.aire_remplissage / self.temps if self.temps else 0,
+            "intervalle_confiance": self.intervalle_confiance,
+        }
+
+    def instantane(self):
+        nb_paquet_genere = self.conter
+        nb_paquet_perdu = self.nb_paquet_perdu
+        return {
+            "temps": self.temps,
+            "paquets_restants": ceil(max(0, self.nb_arrivees_max - self.conter) / max(1, len(self.sources))),
+            "pourcentage_perte": nb_paquet_perdu / nb_paquet_genere * 100 if nb_paquet_genere != 0 else 0,
+            "remplissage_buffer": self.buffer.pourcentage_rempli(),
+            "remplissage_sous_buffers": [buffer.pourcentage_rempli() for buffer in self.buffers],
+            "nb_transferts": self.nb_transferts,
+            "dernier_transfert": self.dernier_transfert,
+            "intervalle_confiance": self.intervalle_confiance,
+            "fini": not self.running,
+        }
+
+    def __getstate__(self):
+        if self.trace is not None:
+            raise ValueError("une simulation qui rejoue une trace ne peut pas être sauvegardée")
+        etat = self.__dict__.copy()
+        etat["observateurs"] = []
+        # Les méthodes chronométrées par un Profileur ne sont pas sauvegardées.
+        for nom in Profileur.PHASES:
+            etat.pop(nom, None)
+        return etat
+
+    def sauvegarder(self, chemin):
+        # L'état est sérialisé avant d'ouvrir le fichier: un échec n'écrase pas une sauvegarde existante.
+        donnees = zlib.compress(pickle.dumps(self, protocol=pickle.HIGHEST_PROTOCOL))
+        with open(chemin, "wb") as fichier:
+            fichier.write(self.SIGNATURE)
+            fichier.write(donnees)
+
+    @classmethod
+    def charger(cls, chemin):
+        with open(chemin, "rb") as fichier:
+            donnees = fichier.read()
+        if not donnees.startswith(cls.SIGNATURE):
+            raise ValueError(f"{chemin} n'est pas une sauvegarde de simulation")
+        moteur = pickle.loads(zlib.decompress(donnees[len(cls.SIGNATURE):]))
+        moteur.__dict__.setdefault("intervalle_confiance", None)
+        # Une simulation arrêtée avant la fin (bouton "Arrêter") reprend là où elle en était.
+        moteur.running = moteur.conter < moteur.nb_arrivees_max
+        return moteur
+
+    def variante(self, taux_transmission=None, mode=None, nb_paquet=None, graine=None):
+        copie = pickle.loads(pickle.dumps(self, protocol=pickle.HIGHEST_PROTOCOL))
+        if taux_transmission is not None:
+            copie.taux_transmission = taux_transmission
+            # La transmission déjà planifiée suivait l'ancien taux: on la replanifie avec le nouveau.
+            copie.calendrier = [evenement for evenement in copie.calendrier if evenement[2] != copie.TRANSMISSION]
+            heapify(copie.calendrier)
+            if taux_transmission:
+                copie._planifier(copie.temps + 1 / taux_transmission, copie.TRANSMISSION)
+        if mode is not None:
+            copie.mode = mode
+        if nb_paquet is not None:
+            copie.nb_arrivees_max = copie.conter + int(nb_paquet) * len(copie.sources)
+        if graine is not None:
+            rng = random.Random(graine)
+            copie.rng = random.Random(f"{graine}:repartition")
+            for source in copie.sources:
+                # Les valeurs déjà tirées sont jetées pour que la variante diverge dès maintenant.
+                source.rng = random.Random(rng.getrandbits(64))
+                source._indice_taille, source._tailles = 0, array("I")
+                source._indice_delai, source._delais = 0, array("d")
+        copie.running = copie.conter < copie.nb_arrivees_max
+        return copie
+
+    def stop(self):
+        self.running = False
+
+
+class CanalInstantanes:
+    """
+    File bornée d'instantanés entre le thread de simulation et l'interface.
+
+    Le moteur y publie (en tant qu'observateur) au plus un instantané par intervalle de
+    temps réel; si l'interface ne suit pas, les plus anciens sont jetés pour ne garder que
+    les plus récents. Seul le thread principal touche à Tkinter: il vient chercher le
+    dernier instantané avec dernier().
+
+    Args:
+        * intervalle (float):
+            Temps minimal, en secondes, entre deux instantanés publiés.
+        * taille (int):
+            Nombre maximal d'instantanés en attente.
+
+    Méthodes:
+        * publier(moteur, force=False) -> None:
+            Observateur à abonner au moteur: publie moteur.instantane() si l'intervalle est écoulé
+            (toujours si force vaut True).
+        * deposer(instantane) -> None:
+            Publie un instantané déjà calculé (par exemple lu dans un CacheResultats).
+        * dernier() -> dict:
+            Vide la file et renvoie le plus récent des instantanés (None si elle était vide).
+    """
+    def __init__(self, intervalle=0.02, taille=2):
+        self.intervalle = intervalle
+        self.file = Queue(maxsize=taille)
+        self._derniere_publication = 0.0
+
+    def publier(self, moteur, force=False):
+        maintenant = perf_counter()
+        if not force and maintenant - self._derniere_publication < self.intervalle:
+            return
+        self._derniere_publication = maintenant
+        self.deposer(moteur.instantane())
+
+    def deposer(self, instantane):
+        while True:
+            try:
+                self.file.put_nowait(instantane)
+                return
+            except Full:
+                try:
+                    self.file.get_nowait()
+                except Empty:
+                    pass
+
+    def dernier(self):
+        instantane = None
+        while True:
+            try:
+                instantane = self.file.get_nowait()
+            except Empty:
+                return instantane
+
+
+class EnregistreurMetriques:
+    """
+    Enregistre au fil de la simulation des séries temporelles de l'état d'un MoteurSimulation.
+
+    L'enregistreur est un observateur du moteur (moteur.abonner(enregistreur.enregistrer, periode)).
+    Chaque enregistrement ajoute une ligne: date simulée, paquets générés, occupation du
+    buffer principal, paquets perdus et transmis (cumulés) et occupation de chaque sous-buffer.
+    Les colonnes sont rangées dans des tableaux typés (array) découpés en blocs de
+    `taille_bloc` lignes, et quelques agrégats sont tenus à jour à chaque appel.
+
+    Pour borner la mémoire sur les longues simulations, deux modes s'ajoutent au mode "complet":
+        - "anneau": au-delà de max_lignes lignes, les blocs les plus anciens sont supprimés;
+        - "decimation": au-delà de max_lignes lignes, une ligne sur deux est supprimée et
+          l'enregistreur ne garde plus ensuite qu'un appel sur deux (puis quatre, etc.).
+    Une ligne compte une cellule par colonne: avec beaucoup de sous-buffers, max_cellules
+    fixe la mémoire occupée quel que soit le nombre de colonnes (max_lignes en est déduit).
+
+    Args:
+        * nb_sous_buffer (int):
+            Nombre de sous-buffers du moteur observé.
+        * mode (str):
+            "complet", "anneau" ou "decimation".
+        * max_lignes (int):
+            Nombre de lignes au-delà duquel les modes "anneau" et "decimation" réduisent les séries.
+        * max_cellules (int):
+            Si donné, remplace max_lignes par max_cellules // nombre de colonnes (au moins 2 lignes).
+        * taille_bloc (int):
+            Nombre de lignes par bloc (ramené au quart de max_lignes s'il le dépasse).
+
+    Attributs:
+        * noms (list):
+            Noms des colonnes.
+        * blocs (list):
+            Blocs de colonnes, chaque bloc étant une liste d'array (une par colonne).
+        * nb_lignes (int):
+            Nombre de lignes conservées.
+        * pas (int):
+            Un appel à enregistrer() sur `pas` produit une ligne (mode "decimation").
+        * nb_appels (int):
+            Nombre d'appels à enregistrer().
+        * somme_occupation (int), max_occupation (int):
+            Somme et maximum de l'occupation du buffer principal sur tous les appels.
+
+    Méthodes:
+        * enregistrer(moteur) -> None:
+            Observateur: met à jour les agrégats et ajoute une ligne aux séries.
+        * colonne(nom) -> array:
+            Renvoie toute la série d'une colonne.
+        * colonnes() -> dict:
+            Renvoie toutes les séries, par nom de colonne.
+        * depuis_colonnes(colonnes, mode="complet", max_lignes=100_000, taille_bloc=4096, max_cellules=None) -> EnregistreurMetriques:
+            Méthode de classe: recrée un enregistreur à partir du résultat de colonnes() (les agrégats
+            sont recalculés sur les lignes conservées).
+        * resume() -> dict:
+            Renvoie les agrégats courants.
+        * exporter_csv(chemin) -> None:
+            Écrit toutes les lignes dans un fichier CSV (avec une ligne d'en-tête).
+        * exporter_npy(chemin) -> None:
+            Écrit les séries dans un fichier .npy sous forme de tableau NumPy structuré.
+    """
+    def __init__(self, nb_sous_buffer, mode="complet", max_lignes=100_000, taille_bloc=4096, max_cellules=None):
+        self.noms = ["temps", "conter", "occupation_buffer", "nb_paquet_perdu", "nb_transmis"]
+        self.noms += [f"sous_buffer_{i}" for i in range(nb_sous_buffer)]
+        self.types = ["d"] + ["q"] * (len(self.noms) - 1)
+        self.mode = mode
+        if max_cellules is not None:
+            max_lignes = max(2, max_cellules // len(self.noms))
+        self.max_lignes = max_lignes
+        # Un bloc entier est alloué (ou supprimé en mode "anneau") d'un coup: il reste petit devant max_lignes.
+        self.taille_bloc = max(1, min(taille_bloc, max_lignes // 4))
+        self.blocs = [self._nouveau_bloc()]
+        self.nb_lignes = 0
+        self.pas = 1
+        self.nb_appels = 0
+        self.somme_occupation = 0
+        self.max_occupation = 0
+        self.dernier = None
+
+    def _nouveau_bloc(self):
+        return [array(code) for code in self.types]
+
+    def enregistrer(self, moteur):
+        self.nb_appels += 1
+        occupation = moteur.buffer.occupation
+        self.somme_occupation += occupation
+        if occupation > self.max_occupation:
+            self.max_occupation = occupation
+        self.dernier = (moteur.temps, moteur.conter, occupation, moteur.nb_paquet_perdu, moteur.nb_transmis)
+        if self.nb_appels % self.pas:
+            return
+        bloc = self.blocs[-1]
+        if len(bloc[0]) == self.taille_bloc:
+            bloc = self._nouveau_bloc()
+            self.blocs.append(bloc)
+        for colonne, valeur in zip(bloc, self.dernier):
+            colonne.append(valeur)
+        for colonne, buffer in zip(bloc[5:], moteur.buffers):
+            colonne.append(buffer.occupation)
+        self.nb_lignes += 1
+        if self.nb_lignes > self.max_lignes:
+            if self.mode == "anneau" and len(self.blocs) > 1:
+                self.nb_lignes -= len(self.blocs.pop(0)[0])
+            elif self.mode == "decimation":
+                self._decimer()
+
+    def _decimer(self):
+        # Les lignes conservées viennent des appels pas, 2 * pas, 3 * pas, etc.: on garde celles
+        # des multiples de 2 * pas (une sur deux à partir de la deuxième), comme le fera
+        # enregistrer() avec le nouveau pas, et on les recopie dans des blocs pleins.
+        colonnes = [self.colonne(nom)[1::2] for nom in self.noms]
+        self.blocs = [
+            [colonne[debut:debut + self.taille_bloc] for colonne in colonnes]
+            for debut in range(0, len(colonnes[0]), self.taille_bloc)
+        ] or [self._nouveau_bloc()]
+        self.nb_lignes = len(colonnes[0])
+        self.pas *= 2
+
+    def colonne(self, nom):
+        indice = self.noms.index(nom)
+        serie = array(self.types[indice])
+        for bloc in self.blocs:
+            serie.extend(bloc[indice])
+        return serie
+
+    def colonnes(self):
+        return {nom: self.colonne(nom) for nom in self.noms}
+
+    @classmethod
+    def depuis_colonnes(cls, colonnes, mode="complet", max_lignes=100_000, taille_bloc=4096, max_cellules=None):
+        enregistreur = cls(len(colonnes) - 5, mode, max_lignes, taille_bloc, max_cellules)
+        taille_bloc = enregistreur.taille_bloc
+        series = [colonnes[nom] for nom in enregistreur.noms]
+        enregistreur.nb_lignes = enregistreur.nb_appels = len(series[0])
+        enregistreur.blocs = [
+            [serie[debut:debut + taille_bloc] for serie in series]
+            for debut in range(0, enregistreur.nb_lignes, taille_bloc)
+        ] or [enregistreur._nouveau_bloc()]
+        occupations = colonnes["occupation_buffer"]
+        enregistreur.somme_occupation = sum(occupations)
+        enregistreur.max_occupation = max(occupations, default=0)
+        if enregistreur.nb_lignes:
+            enregistreur.dernier = tuple(serie[-1] for serie in series[:5])
+        return enregistreur
+
+    def resume(self):
+        temps, conter, occupation, nb_paquet_perdu, nb_transmis = self.dernier or (0, 0, 0, 0, 0)
+        return {
+            "nb_appels": self.nb_appels,
+            "nb_lignes": self.nb_lignes,
+            "temps": temps,
+            "nb_paquet_genere": conter,
+            "nb_paquet_perdu": nb_paquet_perdu,
+            "nb_transmis": nb_transmis,
+            "occupation_moyenne": self.somme_occupation / self.nb_appels if self.nb_appels else 0,
+            "occupation_max": self.max_occupation,
+        }
+
+    def exporter_csv(self, chemin):
+        with open(chemin, "w", newline="") as fichier:
+            ecrivain = csv.writer(fichier)
+            ecrivain.writerow(self.noms)
+            for bloc in self.blocs:
+                ecrivain.writerows(zip(*bloc))
+
+    def exporter_npy(self, chemin):
+        import numpy as np
+        donnees = np.empty(self.nb_lignes, dtype=[(nom, "f8" if code == "d" else "i8") for nom, code in zip(self.noms, self.types)])
+        for nom in self.noms:
+            donnees[nom] = self.colonne(nom)
+        np.save(chemin, donnees)
+
+
+def quantile_student(niveau, ddl):
+    """
+    Quantile bilatéral de la loi de Student à `ddl` degrés de liberté pour un intervalle de
+    confiance de niveau `niveau`, par le développement de Cornish-Fisher du quantile normal
+    (précis au millième dès une dizaine de degrés de liberté).
+    """
+    z = NormalDist().inv_cdf((1 + niveau) / 2)
+    return (
+        z + (z ** 3 + z) / (4 * ddl) + (5 * z ** 5 + 16 * z ** 3 + 3 * z) / (96 * ddl ** 2)
+        + (3 * z ** 7 + 19 * z ** 5 + 17 * z ** 3 - 15 * z) / (384 * ddl ** 3)
+    )
+
+
+def troncature_mser(valeurs):
+    """
+    Nombre de valeurs à retirer au début d'une série pour éliminer son régime transitoire
+    (règle MSER): celui qui minimise la variance de la moyenne des valeurs restantes,
+    sans jamais retirer plus de la moitié de la série.
+    """
+    n = len(valeurs)
+    somme = somme_carres = 0.0
+    meilleure, troncature = float("inf"), 0
+    # Les sommes des valeurs restantes sont accumulées depuis la fin de la série.
+    for d in range(n - 1, -1, -1):
+        somme += valeurs[d]
+        somme_carres += valeurs[d] ** 2
+        if d <= n // 2:
+            k = n - d
+            statistique = (somme_carres - somme * somme / k) / (k * k)
+            if statistique <= meilleure:
+                meilleure, troncature = statistique, d
+    return troncature
+
+
+class ArretPrecision:
+    """
+    Arrête un MoteurSimulation dès que le taux de perte est connu avec la précision demandée,
+    au lieu de simuler un nombre fixe de paquets.
+
+    La méthode est celle des moyennes par lots: toutes les `taille_lot` arrivées, l'observateur
+    ferme un lot et calcule sur ce lot le pourcentage de paquets perdus et le remplissage moyen
+    du buffer principal. Les premiers lots, pollués par le régime transitoire (buffers vides au
+    départ), sont écartés par la règle MSER (troncature_mser). L'intervalle de confiance de
+    Student est calculé sur les lots restants, qui sont supposés à peu près indépendants.
+    Pour borner la mémoire et garder des lots assez longs pour l'être, quand le nombre de lots
+    atteint nb_lots_max, les lots voisins sont fusionnés deux à deux et la taille des lots double.
+
+    Le moteur est arrêté (moteur.stop()) dès que la demi-largeur de l'intervalle du taux de
+    perte (et du remplissage, si demi_largeur_remplissage est donnée) est sous la cible;
+    nb_paquet ne sert plus alors que de plafond. Le dernier intervalle est recopié dans
+    moteur.intervalle_confiance, et apparaît donc dans moteur.resultats() et moteur.instantane().
+
+    Args:
+        * demi_largeur (float):
+            Demi-largeur visée pour l'intervalle du pourcentage de perte, en points de pourcentage
+            (ou en fraction de la moyenne si relative vaut True).
+        * demi_largeur_remplissage (float):
+            Demi-largeur visée pour l'intervalle du remplissage moyen du buffer principal
+            (None pour ne pas en tenir compte dans le critère d'arrêt).
+        * taille_lot (int):
+            Nombre d'arrivées des premiers lots.
+        * niveau (float):
+            Niveau de confiance des intervalles.
+        * nb_lots_min (int):
+            Nombre minimal de lots conservés après troncature avant de pouvoir s'arrêter.
+        * nb_lots_max (int):
+            Nombre de lots qui déclenche leur fusion deux à deux (pair).
+        * relative (bool):
+            Si True, les demi-largeurs sont relatives à la moyenne estimée.
+
+    Attributs:
+        * lots (list):
+            Pour chaque lot fermé: [paquets perdus, arrivées, aire de remplissage, durée].
+        * nb_fusion (int):
+            Nombre de périodes de taille_lot arrivées par lot.
+        * intervalle (dict):
+            Le dernier intervalle calculé (None tant qu'il n'y a pas assez de lots).
+
+    Méthodes:
+        * attacher(moteur) -> None:
+            Abonne l'observateur au moteur, à partir de l'état courant de celui-ci.
+        * observer(moteur) -> None:
+            Observateur appelé toutes les taille_lot arrivées.
+        * estimer() -> dict:
+            Renvoie, pour "pourcentage_perte" et "remplissage_moyen", un couple (moyenne, demi-largeur),
+            ainsi que le nombre de lots conservés ("nb_lots") et d'arrivées écartées ("troncature").
+        * precision_atteinte() -> bool:
+            Indique si les demi-largeurs visées sont atteintes.
+    """
+    def __init__(self, demi_largeur, demi_largeur_remplissage=None, taille_lot=1000, niveau=0.95,
+                 nb_lots_min=10, nb_lots_max=64, relative=False):
+        self.demi_largeur = demi_largeur
+        self.demi_largeur_remplissage = demi_largeur_remplissage
+        self.taille_lot = max(1, int(taille_lot))
+        self.niveau = niveau
+        self.nb_lots_min = max(2, nb_lots_min)
+        self.nb_lots_max = max(2 * self.nb_lots_min, nb_lots_max + nb_lots_max % 2)
+        self.relative = relative
+        self.lots = []
+        self.nb_fusion = 1
+        self.intervalle = None
+        self._nb_periodes = 0
+        self._debut = None
+
+    def attacher(self, moteur):
+        self._debut = (moteur.nb_paquet_perdu, moteur.conter, moteur.aire_remplissage, moteur.temps)
+        moteur.abonner(self.observer, self.taille_lot)
+
+    def observer(self, moteur):
+        self._nb_periodes += 1
+        if self._nb_periodes < self.nb_fusion:
+            return
+        fin = (moteur.nb_paquet_perdu, moteur.conter, moteur.aire_remplissage, moteur.temps)
+        self.lots.append([b - a for a, b in zip(self._debut, fin)])
+        self._debut = fin
+        self._nb_periodes = 0
+        if len(self.lots) == self.nb_lots_max:
+            self.lots = [[a + b for a, b in zip(*self.lots[i:i + 2])] for i in range(0, len(self.lots), 2)]
+            self.nb_fusion *= 2
+        self.intervalle = self.estimer()
+        moteur.intervalle_confiance = self.intervalle
+        if self.precision_atteinte():
+            moteur.stop()
+
+    def _intervalle(self, valeurs):
+        k = len(valeurs)
+        moyenne = sum(valeurs) / k
+        variance = sum((v - moyenne) ** 2 for v in valeurs) / (k - 1)
+        return moyenne, quantile_student(self.niveau, k - 1) * (variance / k) ** 0.5
+
+    def estimer(self):
+        pertes = [100 * perdus / arrivees for perdus, arrivees, _, _ in self.lots]
+        remplissages = [aire / duree if duree else 0 for _, _, aire, duree in self.lots]
+        troncature = max(troncature_mser(pertes), troncature_mser(remplissages))
+        if len(self.lots) - troncature < 2:
+            return None
+        return {
+            "pourcentage_perte": self._intervalle(pertes[troncature:]),
+            "remplissage_moyen": self._intervalle(remplissages[troncature:]),
+            "nb_lots": len(self.lots) - troncature,
+            "troncature": troncature * self.nb_fusion * self.taille_lot,
+            "niveau": self.niveau,
+        }
+
+    def _atteinte(self, intervalle, cible):
+        moyenne, demi_largeur = intervalle
+        return demi_largeur <= (cible * abs(moyenne) if self.relative else cible)
+
+    def precision_atteinte(self):
+        if self.intervalle is None or self.intervalle["nb_lots"] < self.nb_lots_min:
+            return False
+        if not self._atteinte(self.intervalle["pourcentage_perte"], self.demi_largeur):
+            return False
+        return self.demi_largeur_remplissage is None or self._atteinte(self.intervalle["remplissage_moyen"], self.demi_largeur_remplissage)
+
+
+class Profileur:
+    """
+    Instrumentation optionnelle de la boucle de MoteurSimulation: temps cumulés et nombre
+    d'appels de chaque phase, et histogramme de la durée d'une étape.
+
+    attacher(moteur) remplace, sur l'instance seulement, les méthodes etape, _arrivee,
+    _transfert, _transmission et selection_buffer ainsi que les observateurs déjà abonnés par
+    des versions chronométrées. Sans profileur, le moteur est donc exactement le même et
+    l'instrumentation ne coûte rien. Les phases s'emboîtent (selection_buffer est appelée par
+    transfert, elle-même appelée par etape): chaque temps est rangé sous la pile de phases qui
+    l'a produit, avec son temps total et son temps propre (hors phases appelées).
+
+    Seule une étape sur `periode_echantillon` est chronométrée, avec toutes les phases qu'elle
+    appelle, et rangée dans l'histogramme par puissance de deux de sa durée en nanosecondes;
+    les autres ne paient qu'un test par phase. Les nombres d'appels et les temps du rapport
+    sont extrapolés à toutes les étapes (ils sont exacts avec periode_echantillon=1, au prix
+    d'une simulation environ deux fois plus lente). D'autres durées (par exemple le dessin de
+    l'interface, dans un autre thread) peuvent être ajoutées telles quelles avec mesurer().
+
+    Args:
+        * periode_echantillon (int):
+            Une étape sur `periode_echantillon` est chronométrée.
+
+    Attributs:
+        * temps (dict):
+            Pour chaque pile de phases (tuple de noms): [nombre d'appels, temps total, temps propre],
+            en nanosecondes, mesurés sur les étapes chronométrées.
+        * histogramme (list):
+            histogramme[b] est le nombre d'étapes échantillonnées dont la durée d est telle que
+            2**b <= d < 2**(b + 1) nanosecondes.
+        * nb_etapes (int), nb_echantillons (int):
+            Nombre d'étapes exécutées et d'étapes chronométrées.
+
+    Méthodes:
+        * attacher(moteur) -> None:
+            Chronomètre les phases du moteur (abonner les observateurs avant).
+        * detacher(moteur) -> None:
+            Rend au moteur ses méthodes et ses observateurs d'origine.
+        * mesurer(phase, duree) -> None:
+            Ajoute une durée (en nanosecondes) à une phase extérieure au moteur.
+        * rapport() -> dict:
+            Renvoie les nombres d'appels et les temps (en secondes) extrapolés par pile de phases et par phase,
+            et l'histogramme.
+        * exporter_json(chemin) -> None:
+            Écrit rapport() dans un fichier JSON.
+        * exporter_flamegraph(chemin) -> None:
+            Écrit les temps propres au format « pile repliée » (une ligne "etape;transfert;selection_buffer 123"
+            par pile, en microsecondes) lu par flamegraph.pl, speedscope ou inferno.
+    """
+    PHASES = {
+        "etape": "etape", "_arrivee": "arrivee", "_transfert": "transfert",
+        "_transmission": "transmission", "selection_buffer": "selection_buffer",
+    }
+
+    def __init__(self, periode_echantillon=16):
+        self.periode_echantillon = max(1, int(periode_echantillon))
+        self.temps = {}
+        self.histogramme = [0] * 64
+        self.nb_etapes = 0
+        self.nb_echantillons = 0
+        self._pile = []
+        self._observateurs = {}
+
+    def _chronometrer(self, phase, fonction, racine=False):
+        pile = self._pile
+        temps = self.temps
+
+        def chronometree(*args):
+            # Pile vide: l'étape en cours n'est pas chronométrée.
+            if not pile and not racine:
+                return fonction(*args)
+            chemin = pile[-1][0] + (phase,) if pile else (phase,)
+            # Le cadre accumule la durée des phases appelées, pour en déduire le temps propre.
+            cadre = [chemin, 0]
+            pile.append(cadre)
+            debut = perf_counter_ns()
+            resultat = fonction(*args)
+            duree = perf_counter_ns() - debut
+            pile.pop()
+            if pile:
+                pile[-1][1] += duree
+            mesure = temps.get(chemin)
+            if mesure is None:
+                mesure = temps[chemin] = [0, 0, 0]
+            mesure[0] += 1
+            mesure[1] += duree
+            mesure[2] += duree - cadre[1]
+            return resultat
+
+        return chronometree
+
+    def _chronometrer_etape(self, etape):
+        etape_chronometree = self._chronometrer("etape", etape, racine=True)
+        histogramme = self.histogramme
+
+        def chronometree():
+            self.nb_etapes += 1
+            if self.nb_etapes % self.periode_echantillon:
+                return etape()
+            self.nb_echantillons += 1
+            debut = perf_counter_ns()
+            resultat = etape_chronometree()
+            histogramme[min(63, max(0, (perf_counter_ns() - debut).bit_length() - 1))] += 1
+            return resultat
+
+        return chronometree
+
+    def attacher(self, moteur):
+        for nom, phase in self.PHASES.items():
+            if nom != "etape":
+                setattr(moteur, nom, self._chronometrer(phase, getattr(moteur, nom)))
+        moteur.etape = self._chronometrer_etape(moteur.etape)
+        self._observateurs[id(moteur)] = moteur.observateurs
+        moteur.observateurs = [
+            (self._chronometrer(f"observateur:{getattr(observateur, '__qualname__', type(observateur).__name__)}", observateur), periode)
+            for observateur, periode in moteur.observateurs
+        ]
+
+    def detacher(self, moteur):
+        for nom in self.PHASES:
+            moteur.__dict__.pop(nom, None)
+        moteur.observateurs = self._observateurs.pop(id(moteur), moteur.observateurs)
+
+    def mesurer(self, phase, duree):
+        mesure = self.temps.setdefault((phase,), [0, 0, 0])
+        mesure[0] += 1
+        mesure[1] += duree
+        mesure[2] += duree
+
+    def rapport(self):
+        # Copie en une opération: le thread de simulation peut ajouter des piles pendant la lecture.
+        facteur = self.nb_etapes / self.nb_echantillons if self.nb_echantillons else 1
+        piles = {}
+        for chemin, (nb_appels, total, propre) in list(self.temps.items()):
+            # Seules les phases du moteur sont échantillonnées; celles de mesurer() sont complètes.
+            f = facteur if chemin[0] == "etape" else 1
+            piles[chemin] = {"nb_appels": round(nb_appels * f), "temps_total": total * f / 1e9, "temps_propre": propre * f / 1e9}
+        phases = {}
+        for chemin, mesure in piles.items():
+            phase = phases.setdefault(chemin[-1], {"nb_appels": 0, "temps_total": 0.0, "temps_propre": 0.0})
+            for cle, valeur in mesure.items():
+                phase[cle] += valeur
+        dernier = max((b for b, effectif in enumerate(self.histogramme) if effectif), default=0)
+        return {
+            "nb_etapes": self.nb_etapes,
+            "nb_echantillons": self.nb_echantillons,
+            "phases": phases,
+            "piles": {";".join(chemin): mesure for chemin, mesure in piles.items()},
+            "histogramme_etape": {
+                "bornes_ns": [2 ** b for b in range(dernier + 2)],
+                "effectifs": self.histogramme[:dernier + 1],
+            },
+        }
+
+    def exporter_json(self, chemin):
+        with open(chemin, "w") as fichier:
+            json.dump(self.rapport(), fichier, indent=2, ensure_ascii=False)
+
+    def exporter_flamegraph(self, chemin):
+        with open(chemin, "w") as fichier:
+            for pile, mesure in self.rapport()["piles"].items():
+                microsecondes = round(mesure["temps_propre"] * 1e6)
+                if microsecondes:
+                    fichier.write(f"{pile} {microsecondes}\n")
+
+
+class Topologie:
+    """
+    Description d'un réseau de buffers à plusieurs étages (graphe orienté sans cycle).
+
+    Chaque nœud est un Buffer. Un nœud peut:
+        - recevoir directement les paquets d'une ou plusieurs sources;
+        - collecter les paquets de ses nœuds d'entrée, `taux_collecte` fois par unité de temps:
+          à chaque collecte, un nœud d'entrée est choisi selon sa politique ("chacun son tour",
+          "aléatoire" ou "la plus pleine") et lui cède son premier paquet s'il y a la place;
+        - transmettre son premier paquet hors du réseau, `taux_transmission` fois par unité de temps.
+    Un nœud peut avoir plusieurs nœuds d'entrée et servir d'entrée à plusieurs nœuds. Les
+    entrées d'un nœud doivent avoir été ajoutées avant lui, ce qui garantit l'absence de cycle.
+
+    Le réseau d'origine (une source par sous-buffer, un buffer principal qui collecte nb_buffer
+    fois par unité de temps) s'obtient avec Topologie.deux_niveaux.
+
+    Attributs:
+        * noms (list):
+            Nom de chaque nœud.
+        * indices (dict):
+            Indice de chaque nœud à partir de son nom.
+        * buffers (list):
+            Le Buffer de chaque nœud.
+        * taux_collecte (list), taux_transmission (list), politiques (list), entrees (list):
+            Les caractéristiques de chaque nœud (entrees contient des listes d'indices).
+        * sources (list):
+            Les sources du réseau.
+        * noeuds_sources (list):
+            Indice du nœud alimenté par chaque source.
+
+    Méthodes:
+        * ajouter_noeud(nom, capacite, taux_collecte=0, taux_transmission=0, politique="chacun son tour",
+          entrees=(), compact=False) -> int:
+            Ajoute un nœud et renvoie son indice. `capacite` peut aussi être un Buffer existant.
+        * ajouter_source(source, noeud) -> None:
+            Branche une source sur le nœud `noeud` (nom du nœud).
+        * depuis_dict(description, graine=None) -> Topologie:
+            Méthode de classe: construit une topologie à partir d'un dictionnaire (par exemple lu
+            dans un fichier JSON) de la forme
+            {"noeuds": [{"nom": ..., "capacite": ..., "taux_collecte": ..., "taux_transmission": ...,
+                         "politique": ..., "entrees": [...]}, ...],
+             "sources": [{"noeud": ..., "lambda_param": ..., "taille_max_paquet": ...}, ...]}.
+        * deux_niveaux(sources, buffers, buffer, taux_transmission, mode) -> Topologie:
+            Méthode de classe: le réseau simulé par MoteurSimulation.
+    """
+    def __init__(self):
+        self.noms = []
+        self.indices = {}
+        self.buffers = []
+        self.taux_collecte = []
+        self.taux_transmission = []
+        self.politiques = []
+        self.entrees = []
+        self.sources = []
+        self.noeuds_sources = []
+
+    def ajouter_noeud(self, nom, capacite, taux_collecte=0, taux_transmission=0, politique="chacun son tour", entrees=(), compact=False):
+        if nom in self.indices:
+            raise ValueError(f"le nœud {nom!r} existe déjà")
+        if politique not in MODES:
+            raise ValueError(f"politique inconnue: {politique!r}")
+        for entree in entrees:
+            if entree not in self.indices:
+                raise ValueError(f"le nœud {nom!r} a pour entrée {entree!r}, qui n'a pas été ajouté avant lui")
+        if entrees and not taux_collecte:
+            raise ValueError(f"le nœud {nom!r} a des entrées mais un taux de collecte nul")
+        indice = len(self.noms)
+        self.noms.append(nom)
+        self.indices[nom] = indice
+        self.buffers.append(capacite if isinstance(capacite, Buffer) else Buffer(capacite, compact))
+        self.taux_collecte.append(taux_collecte)
+        self.taux_transmission.append(taux_transmission)
+        self.politiques.append(politique)
+        self.entrees.append([self.indices[entree] for entree in entrees])
+        return indice
+
+    def ajouter_source(self, source, noeud):
+        self.sources.append(source)
+        self.noeuds_sources.append(self.indices[noeud])
+
+    @classmethod
+    def depuis_dict(cls, description, graine=None):
+        rng = random.Random(graine)
+        topologie = cls()
+        for noeud in description["noeuds"]:
+            topologie.ajouter_noeud(
+                noeud["nom"], noeud["capacite"], noeud.get("taux_collecte", 0), noeud.get("taux_transmission", 0),
+                noeud.get("politique", "chacun son tour"), noeud.get("entrees", ()), noeud.get("compact", False)
+            )
+        for source in description["sources"]:
+            topologie.ajouter_source(Source(source["lambda_param"], source["taille_max_paquet"], graine=rng.getrandbits(64)), source["noeud"])
+        return topologie
+
+    @classmethod
+    def deux_niveaux(cls, sources, buffers, buffer, taux_transmission, mode):
+        topologie = cls()
+        for i, (source, sous_buffer) in enumerate(zip(sources, buffers)):
+            topologie.ajouter_noeud(f"sous_buffer_{i}", sous_buffer)
+            topologie.ajouter_source(source, f"sous_buffer_{i}")
+        topologie.ajouter_noeud("buffer", buffer, len(buffers), taux_transmission, mode, topologie.noms[:])
+        return topologie
+
+
+class MoteurTopologie:
+    """
+    Moteur de simulation à événements discrets d'une Topologie quelconque.
+
+    Il fonctionne comme MoteurSimulation, avec trois types d'événements: ARRIVEE d'un paquet
+    d'une source dans son nœud, COLLECTE d'un paquet par un nœud auprès de l'une de ses
+    entrées et TRANSMISSION d'un paquet hors du réseau. Le traitement d'un événement ne
+    touche que les nœuds concernés et leurs voisins directs: chaque nœud de politique
+    "la plus pleine" garde un TasMaxIndexe du remplissage de ses entrées, mis à jour
+    seulement quand l'une d'elles change. Avec Topologie.deux_niveaux et la même graine,
+    il donne exactement les mêmes résultats que MoteurSimulation.
+
+    Args:
+        * topologie (Topologie):
+            Le réseau à simuler.
+        * nb_paquet (int):
+            Nombre moyen de paquets à générer par source.
+        * graine (int ou str):
+            Graine du générateur utilisé par la politique "aléatoire".
+
+    Attributs:
+        * temps (float), conter (int), nb_paquet_perdu (int):
+            Comme pour MoteurSimulation.
+        * nb_perdus (list):
+            Nombre de paquets perdus à l'entrée de chaque nœud.
+        * nb_collectes (list):
+            Nombre de paquets reçus de ses entrées par chaque nœud.
+        * nb_transmis (list):
+            Nombre de paquets transmis hors du réseau par chaque nœud.
+
+    Méthodes:
+        * abonner(observateur, periode=1) -> None, etape() -> bool, run() -> dict, stop() -> None:
+            Comme pour MoteurSimulation.
+        * resultats() -> dict:
+            Renvoie les compteurs globaux et, pour chaque nœud, son remplissage et ses compteurs.
+    """
+    ARRIVEE, COLLECTE, TRANSMISSION = 0, 1, 2
+
+    def __init__(self, topologie, nb_paquet, graine=None):
+        self.topologie = topologie
+        self.buffers = topologie.buffers
+        self.sources = topologie.sources
+        nb_noeuds = len(self.buffers)
+        self.nb_arrivees_max = int(nb_paquet) * len(self.sources)
+        self.temps = 0.0
+        self.conter = 0
+        self.nb_paquet_perdu = 0
+        self.nb_perdus = [0] * nb_noeuds
+        self.nb_collectes = [0] * nb_noeuds
+        self.nb_transmis = [0] * nb_noeuds
+        self.running = True
+        self.calendrier = []
+        self.observateurs = []
+        self.rng = random.Random(None if graine is None else f"{graine}:repartition")
+        self._numero = 0
+        self._tours = [0] * nb_noeuds
+        # Pour chaque nœud, les (nœud qui le collecte, position parmi les entrées de ce nœud).
+        self._sorties = [[] for _ in range(nb_noeuds)]
+        for v, entrees in enumerate(topologie.entrees):
+            for k, u in enumerate(entrees):
+                self._sorties[u].append((v, k))
+        self.remplissages = [
+            TasMaxIndexe([self.buffers[u].pourcentage_rempli() for u in entrees]) if politique == "la plus pleine" else None
+            for entrees, politique in zip(topologie.entrees, topologie.politiques)
+        ]
+        self._initialiser()
+
+    def _planifier(self, date, type_evenement, indice):
+        self._numero += 1
+        heappush(self.calendrier, (date, self._numero, type_evenement, indice))
+
+    def _initialiser(self):
+        for i, source in enumerate(self.sources):
+            self._planifier(source.delai_arrivee(), self.ARRIVEE, i)
+        for v in range(len(self.buffers)):
+            if self.topologie.entrees[v]:
+                self._planifier(1 / self.topologie.taux_collecte[v], self.COLLECTE, v)
+            if self.topologie.taux_transmission[v]:
+                self._planifier(1 / self.topologie.taux_transmission[v], self.TRANSMISSION, v)
+
+    def abonner(self, observateur, periode=1):
+        self.observateurs.append((observateur, max(1, int(periode))))
+
+    def _modifie(self, u):
+        # Seuls les tas des nœuds qui collectent u sont à mettre à jour.
+        for v, k in self._sorties[u]:
+            if self.remplissages[v] is not None:
+                self.remplissages[v].mettre_a_jour(k, self.buffers[u].pourcentage_rempli())
+
+    def _selection_entree(self, v):
+        entrees = self.topologie.entrees[v]
+        politique = self.topologie.politiques[v]
+        if politique == "aléatoire":
+            return entrees[self.rng.randrange(len(entrees))]
+        if politique == "la plus pleine":
+            return entrees[self.remplissages[v].maximum()]
+        k = self._tours[v]
+        self._tours[v] = (k + 1) % len(entrees)
+        return entrees[k]
+
+    def _arrivee(self, i):
+        source = self.sources[i]
+        j = self.topologie.noeuds_sources[i]
+        buffer = self.buffers[j]
+        paquet = source.generation_paquet()
+        if buffer.buffer_plein(paquet):
+            source.nb_paquet_perdu += 1
+            self.nb_paquet_perdu += 1
+            self.nb_perdus[j] += 1
+        else:
+            buffer += paquet
+            self._modifie(j)
+        self.conter += 1
+        self._planifier(self.temps + source.delai_arrivee(), self.ARRIVEE, i)
+        for observateur, periode in self.observateurs:
+            if self.conter % periode == 0:
+                observateur(self)
+        if self.conter >= self.nb_arrivees_max:
+            self.stop()
+
+    def _collecte(self, v):
+        u = self._selection_entree(v)
+        entree, buffer = self.buffers[u], self.buffers[v]
+        if entree.file_attente and not buffer.buffer_plein(entree.file_attente[0]):
+            paquet, _ = entree.transmettre_paquet()
+            buffer += paquet
+            self.nb_collectes[v] += 1
+            self._modifie(u)
+            self._modifie(v)
+        self._planifier(self.temps + 1 / self.topologie.taux_collecte[v], self.COLLECTE, v)
+
+    def _transmission(self, v):
+        paquet, _ = self.buffers[v].transmettre_paquet()
+        if paquet is not None:
+            self.nb_transmis[v] += 1
+            self._modifie(v)
+        self._planifier(self.temps + 1 / self.topologie.taux_transmission[v], self.TRANSMISSION, v)
+
+    def etape(self):
+        if not self.running or not self.calendrier:
+            return False
+        self.temps, _, type_evenement, indice = heappop(self.calendrier)
+        if type_evenement == self.ARRIVEE:
+            self._arrivee(indice)
+        elif type_evenement == self.COLLECTE:
+            self._collecte(indice)
+        else:
+            self._transmission(indice)
+        return self.running
+
+    def run(self):
+        while self.etape():
+            pass
+        return self.resultats()
+
+    def resultats(self):
+        return {
+            "temps": self.temps,
+            "nb_paquet_genere": self.conter,
+            "nb_paquet_perdu": self.nb_paquet_perdu,
+            "nb_transmis": sum(self.nb_transmis),
+            "pourcentage_perte": self.nb_paquet_perdu / self.conter * 100 if self.conter != 0 else 0,
+            "noeuds": {
+                nom: {
+                    "pourcentage_rempli": buffer.pourcentage_rempli(),
+                    "nb_perdus": perdus,
+                    "nb_collectes": collectes,
+                    "nb_transmis": transmis,
+                }
+                for nom, buffer, perdus, collectes, transmis in zip(
+                    self.topologie.noms, self.buffers, self.nb_perdus, self.nb_collectes, self.nb_transmis
+                )
+            },
+        }
+
+    def stop(self):
+        self.running = False
+
+
+class SimulateurLot:
+    """
+    Simulateur vectorisé (NumPy) de R réplications indépendantes d'une même configuration.
+
+    Toutes les réplications avancent ensemble, pas de temps par pas de temps: l'état de
+    chaque réplication est rangé dans des tableaux NumPy (files circulaires des tailles de
+    paquets, occupations, compteurs de pertes), et les tirages aléatoires sont faits par
+    blocs pour toutes les réplications et toutes les sources à la fois.
+
+    Le modèle est la version en temps discret de celui de MoteurSimulation: à chaque unité
+    de temps, chaque source reçoit un nombre d'arrivées tiré selon une loi de Poisson de
+    paramètre lambda_param (tailles uniformes de 1 à taille_max_paquet), puis nb_buffer
+    transferts sont faits vers le buffer principal selon le mode, puis le buffer principal
+    transmet taux_transmission paquets (la partie fractionnaire est reportée au pas suivant).
+    Contrairement à Interface.demarrer_sim, toutes les sources ont le même lambda_param et
+    tous les sous-buffers la même capacite_sous_buffer.
+
+    NumPy n'est importé qu'à l'utilisation de cette classe.
+
+    Args:
+        * parametre (dict):
+            Les paramètres de simulation, avec les mêmes clés que Interface.parametre.
+        * mode (str):
+            "chacun son tour", "aléatoire" ou "la plus pleine".
+        * nb_replications (int):
+            Nombre de réplications simulées ensemble.
+        * graine (int):
+            Graine du générateur aléatoire (None pour une graine imprévisible).
+        * taille_bloc (int):
+            Nombre de pas de temps dont les arrivées sont tirées en une fois.
+
+    Méthodes:
+        * run() -> dict:
+            Exécute la simulation et renvoie, pour chaque réplication, le nombre de paquets
+            générés, perdus et transmis, le pourcentage de perte et le remplissage moyen
+            du buffer principal et des sous-buffers.
+    """
+    def __init__(self, parametre, mode, nb_replications, graine=None, taille_bloc=256):
+        import numpy as np
+        self.parametre = parametre
+        self.mode = mode
+        self.nb_replications = int(nb_replications)
+        self.taille_bloc = int(taille_bloc)
+        self.rng = np.random.default_rng(graine)
+
+    def run(self):
+        import numpy as np
+        R = self.nb_replications
+        N = int(self.parametre["nb_buffer"])
+        lambda_param = float(self.parametre["lambda_param"])
+        taille_max = int(self.parametre["taille_max_paquet"])
+        capacite_sous = int(self.parametre["capacite_sous_buffer"])
+        capacite = int(self.parametre["capacite_buffer"])
+        taux_transmission = float(self.parametre["taux_transmission"])
+        nb_etapes = max(1, ceil(self.parametre["nb_paquet"] / lambda_param))
+        rangs = np.arange(R)
+
+        # Les tailles étant d'au moins 1, une file ne contient jamais plus de paquets que sa capacité.
+        files = np.zeros((R, N, capacite_sous), dtype=np.int32)
+        debut = np.zeros((R, N), dtype=np.int64)
+        longueur = np.zeros((R, N), dtype=np.int64)
+        occupation = np.zeros((R, N), dtype=np.int64)
+        file_principale = np.zeros((R, capacite), dtype=np.int32)
+        debut_p = np.zeros(R, dtype=np.int64)
+        longueur_p = np.zeros(R, dtype=np.int64)
+        occupation_p = np.zeros(R, dtype=np.int64)
+
+        genere = np.zeros(R, dtype=np.int64)
+        perdu = np.zeros(R, dtype=np.int64)
+        transmis = np.zeros(R, dtype=np.int64)
+        somme_remplissage = np.zeros(R)
+        somme_remplissage_sous = np.zeros((R, N))
+        credit = 0.0
+        tour = 0
+
+        for etape in range(nb_etapes):
+            if etape % self.taille_bloc == 0:
+                bloc = self.rng.poisson(lambda_param, size=(min(self.taille_bloc, nb_etapes - etape), R, N))
+            arrivees = bloc[etape % self.taille_bloc]
+            genere += arrivees.sum(axis=1)
+
+            # Arrivées: la k-ième arrivée du pas de temps est traitée pour toutes les files à la fois.
+            for k in range(int(arrivees.max())):
+                actives = arrivees > k
+                tailles = self.rng.integers(1, taille_max + 1, size=(R, N))
+                acceptes = actives & (occupation + tailles <= capacite_sous)
+                perdu += (actives & ~acceptes).sum(axis=1)
+                r, i = np.nonzero(acceptes)
+                files[r, i, (debut[r, i] + longueur[r, i]) % capacite_sous] = tailles[r, i]
+                longueur[r, i] += 1
+                occupation[r, i] += tailles[r, i]
+
+            # Transferts vers le buffer principal, un par source.
+            for _ in range(N):
+                if self.mode == "aléatoire":
+                    choix = self.rng.integers(0, N, size=R)
+                elif self.mode == "la plus pleine":
+                    choix = np.argmax(occupation, axis=1)
+                else:
+                    choix = np.full(R, tour)
+                    tour = (tour + 1) % N
+                tete = files[rangs, choix, debut[rangs, choix]]
+                possible = (longueur[rangs, choix] > 0) & (occupation_p + tete <= capacite)
+                r, c, t = rangs[possible], choix[possible], tete[possible]
+                debut[r, c] = (debut[r, c] + 1) % capacite_sous
+                longueur[r, c] -= 1
+                occupation[r, c] -= t
+                file_principale[r, (debut_p[r] + longueur_p[r]) % capacite] = t
+                longueur_p[r] += 1
+                occupation_p[r] += t
+
+            # Transmissions du buffer principal.
+            credit += taux_transmission
+            while credit >= 1:
+                credit -= 1
+                r = rangs[longueur_p > 0]
+                if not len(r):
+                    credit -= int(credit)
+                    break
+                occupation_p[r] -= file_principale[r, debut_p[r]]
+                debut_p[r] = (debut_p[r] + 1) % capacite
+                longueur_p[r] -= 1
+                transmis[r] += 1
+
+            somme_remplissage += occupation_p / capacite * 100
+            somme_remplissage_sous += occupation / capacite_sous * 100
+
+        return {
+            "nb_paquet_genere": genere,
+            "nb_paquet_perdu": perdu,
+            "nb_transmis": transmis,
+            "pourcentage_perte": np.where(genere != 0, perdu / np.maximum(genere, 1) * 100, 0),
+            "remplissage_moyen": somme_remplissage / nb_etapes,
+            "remplissage_sous_buffer_moyen": somme_remplissage_sous / nb_etapes,
+        }
+
+
+class CacheResultats:
+    """
+    Cache sur disque des résultats de simulations terminées, adressé par leur contenu.
+
+    Une simulation est entièrement déterminée par ses paramètres, son mode, sa graine et la
+    version du moteur (VERSION_MOTEUR): la clé d'une entrée est l'empreinte SHA-256 de leur
+    description JSON canonique (clés triées, paramètres convertis en float pour que 3 et 3.0
+    donnent la même clé). Une simulation sans graine n'est jamais mise en cache.
+
+    Chaque entrée est un fichier (compressé, au format pickle comme les sauvegardes de
+    MoteurSimulation: le dossier doit être de confiance) qui contient les résultats, le dernier
+    instantané et, éventuellement, les séries d'un EnregistreurMetriques (EnregistreurMetriques.colonnes()).
+    Elle ne contient que des types de base (dict, list, array): elle se relit quel que soit le
+    module qui a lancé la simulation. Plusieurs processus
+    peuvent partager le même dossier: une entrée est écrite dans un fichier temporaire puis
+    renommée (os.replace), si bien qu'un lecteur voit l'ancienne version ou la nouvelle, jamais
+    un fichier à moitié écrit. Lire une entrée met à jour sa date de modification; quand la
+    taille totale dépasse taille_max, les entrées les moins récemment utilisées sont supprimées
+    jusqu'à redescendre à 90 % de taille_max (sous un verrou de fichier là où fcntl existe, pour
+    qu'un seul processus fasse le ménage à la fois). Parcourir tout le dossier coûte cher: chaque
+    processus tient une estimation de la taille du cache, augmentée à chaque écriture, et ne le
+    parcourt que lorsqu'elle dépasse taille_max ou toutes les PERIODE_EVICTION écritures (pour
+    tenir compte des écritures des autres processus).
+    Les erreurs d'écriture sont ignorées: un cache inutilisable ne fait que ralentir les simulations.
+
+    Args:
+        * dossier (str):
+            Dossier du cache (par défaut ~/.cache/projet-buffer).
+        * taille_max (int):
+            Taille maximale du cache, en octets.
+
+    Méthodes:
+        * cle(parametre, mode, graine) -> str:
+            Renvoie la clé d'une simulation (None si graine vaut None).
+        * lire(cle) -> dict:
+            Renvoie l'entrée {"resultats", "instantane", "metriques"} de cette clé (None si elle est absente).
+        * ecrire(cle, resultats, instantane=None, metriques=None) -> bool:
+            Enregistre une entrée, puis supprime les plus anciennes si le cache est trop gros.
+            Renvoie False si l'entrée n'a pas pu être écrite.
+        * vider() -> None:
+            Supprime toutes les entrées.
+    """
+    SIGNATURE = b"CACHEBUF"
+    EXTENSION = ".res"
+    PERIODE_EVICTION = 100
+    # Estimation de la taille de chaque dossier de cache et nombre d'écritures depuis le dernier
+    # parcours, propres au processus (un CacheResultats est recopié pour chaque tâche d'un pool).
+    _estimations = {}
+
+    def __init__(self, dossier=None, taille_max=256 * 2 ** 20):
+        self.dossier = dossier or os.path.join(os.path.expanduser("~"), ".cache", "projet-buffer")
+        self.taille_max = taille_max
+
+    def cle(self, parametre, mode, graine):
+        if graine is None:
+            return None
+        description = {
+            "version": VERSION_MOTEUR,
+            "parametre": {cle: float(parametre.get(cle, valeur)) for cle, valeur in PARAMETRE_DEFAUT.items()},
+            "mode": mode,
+            "graine": graine,
+        }
+        return hashlib.sha256(json.dumps(description, sort_keys=True, separators=(",", ":")).encode()).hexdigest()
+
+    def _chemin(self, cle):
+        return os.path.join(self.dossier, cle[:2], cle[2:] + self.EXTENSION)
+
+    def lire(self, cle):
+        if cle is None:
+            return None
+        chemin = self._chemin(cle)
+        try:
+            with open(chemin, "rb") as fichier:
+                donnees = fichier.read()
+            if not donnees.startswith(self.SIGNATURE):
+                raise ValueError(f"{chemin} n'est pas une entrée du cache")
+            entree = pickle.loads(zlib.decompress(donnees[len(self.SIGNATURE):]))
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError, zlib.error, pickle.UnpicklingError, EOFError, AttributeError, ImportError):
+            # Entrée illisible (fichier abîmé, classe renommée ou introuvable...): on l'oublie.
+            self._supprimer(chemin)
+            return None
+        try:
+            os.utime(chemin)
+        except OSError:
+            pass
+        return entree
+
+    def ecrire(self, cle, resultats, instantane=None, metriques=None):
+        if cle is None:
+            return False
+        donnees = self.SIGNATURE + zlib.compress(pickle.dumps(
+            {"resultats": resultats, "instantane": instantane, "metriques": metriques}, protocol=pickle.HIGHEST_PROTOCOL
+        ))
+        if len(donnees) > self.taille_max:
+            return False
+        chemin = self._chemin(cle)
+        temporaire = f"{chemin}.{os.getpid()}.{get_ident()}.tmp"
+        try:
+            os.makedirs(os.path.dirname(chemin), exist_ok=True)
+            with open(temporaire, "wb") as fichier:
+                fichier.write(donnees)
+            os.replace(temporaire, chemin)
+        except OSError:
+            self._supprimer(temporaire)
+            return False
+        estimation = self._estimations.get(self.dossier)
+        if estimation is None or estimation[0] + len(donnees) > self.taille_max or estimation[1] + 1 >= self.PERIODE_EVICTION:
+            self._evincer()
+        else:
+            self._estimations[self.dossier] = (estimation[0] + len(donnees), estimation[1] + 1)
+        return True
+
+    def _supprimer(self, chemin):
+        try:
+            os.remove(chemin)
+        except OSError:
+            pass
+
+    def _entrees(self):
+        entrees = []
+        with os.scandir(self.dossier) as dossiers:
+            for dossier in dossiers:
+                if not dossier.is_dir():
+                    continue
+                with os.scandir(dossier.path) as fichiers:
+                    for fichier in fichiers:
+                        if fichier.name.endswith(self.EXTENSION):
+                            try:
+                                etat = fichier.stat()
+                            except FileNotFoundError:
+                                continue
+                            entrees.append((etat.st_mtime, etat.st_size, fichier.path))
+        return entrees
+
+    def _evincer(self):
+        try:
+            import fcntl
+        except ImportError:
+            fcntl = None
+        try:
+            with open(os.path.join(self.dossier, ".verrou"), "a") as verrou:
+                if fcntl is not None:
+                    fcntl.flock(verrou, fcntl.LOCK_EX)
+                entrees = self._entrees()
+                taille = sum(taille for _, taille, _ in entrees)
+                if taille > self.taille_max:
+                    for _, taille_entree, chemin in sorted(entrees):
+                        if taille <= 0.9 * self.taille_max:
+                            break
+                        self._supprimer(chemin)
+                        taille -= taille_entree
+                self._estimations[self.dossier] = (taille, 0)
+        except OSError:
+            pass
+
+    def vider(self):
+        if not os.path.isdir(self.dossier):
+            return
+        for _, _, chemin in self._entrees():
+            self._supprimer(chemin)
+        self._estimations.pop(self.dossier, None)
+
+
+def creer_composants(parametre, nb_sous_buffer, graine=None):
+    """
+    Crée les sources, les sous-buffers et le buffer principal d'une simulation, comme le
+    fait le bouton "Démarrer la simulation": chaque source a un lambda tiré entre 1 et
+    lambda_param et chaque sous-buffer une capacité tirée entre 1 et capacite_sous_buffer.
+    Un lambda_param entier donne un lambda entier tiré uniformément (comme l'interface l'a
+    toujours fait); sinon, le lambda est un réel tiré uniformément entre 1 et lambda_param
+    (entre lambda_param et 1 si lambda_param < 1).
+
+    Args:
+        * parametre (dict):
+            Les paramètres de simulation (mêmes clés que Interface.parametre).
+        * nb_sous_buffer (int):
+            Nombre de couples source / sous-buffer.
+        * graine (int ou str):
+            Graine maîtresse: elle détermine les tirages ci-dessus et la graine de chaque source
+            (None pour une graine imprévisible).
+    Returns:
+        * tuple:
+            (liste des sources, liste des sous-buffers, buffer principal).
+    """
+    lambda_param = float(parametre["lambda_param"])
+    if lambda_param <= 0:
+        raise ValueError(f"lambda_param doit être strictement positif (et non {parametre['lambda_param']})")
+    rng = random.Random(graine)
+    if lambda_param.is_integer():
+        tirer_lambda = lambda: rng.randint(1, int(lambda_param))
+    else:
+        tirer_lambda = lambda: rng.uniform(1, lambda_param)
+    sources = [
+        Source(tirer_lambda(), int(parametre["taille_max_paquet"]), graine=rng.getrandbits(64))
+        for _ in range(nb_sous_buffer)
+    ]
+    buffers = [Buffer(rng.randint(1, int(parametre["capacite_sous_buffer"]))) for _ in range(nb_sous_buffer)]
+    buffer = Buffer(parametre["capacite_buffer"])
+    return sources, buffers, buffer
+
+
+def executer_point(point):
+    """
+    Simule un point d'un balayage de paramètres avec MoteurSimulation.
+
+    Tous les tirages aléatoires du point découlent de sa graine: le résultat ne dépend donc
+    pas du processus qui l'exécute ni de l'ordre dans lequel les points sont traités.
+    Si parametre["precision"] est non nul, la simulation s'arrête dès que l'intervalle de
+    confiance du taux de perte a cette demi-largeur (voir ArretPrecision), nb_paquet
+    n'étant plus qu'un plafond.
+
+    Args:
+        * point (tuple):
+            (parametre, mode, graine) ou (parametre, mode, graine, cache): si le CacheResultats
+            `cache` contient déjà ce point, la simulation n'est pas refaite.
+    Returns:
+        * dict:
+            Les paramètres du point, le pourcentage de paquets perdus, le remplissage moyen du buffer
+            principal et l'intervalle de confiance (None sans précision demandée).
+    """
+    parametre, mode, graine, *cache = point
+    cache = cache[0] if cache else None
+    cle = cache.cle(parametre, mode, graine) if cache is not None else None
+    entree = cache.lire(cle) if cle is not None else None
+    if entree is not None:
+        resultats = entree["resultats"]
+    else:
+        sources, buffers, buffer = creer_composants(parametre, int(parametre["nb_buffer"]), graine)
+        moteur = MoteurSimulation(sources, buffers, parametre["taux_transmission"], parametre["nb_paquet"], buffer, mode, graine=graine)
+        if parametre.get("precision"):
+            ArretPrecision(parametre["precision"]).attacher(moteur)
+        resultats = moteur.run()
+        if cle is not None:
+            cache.ecrire(cle, resultats, moteur.instantane())
+    return {
+        **parametre,
+        "mode": mode,
+        "graine": graine,
+        "pourcentage_perte": resultats["pourcentage_perte"],
+        "remplissage_moyen": resultats["remplissage_moyen"],
+        "intervalle_confiance": resultats["intervalle_confiance"],
+    }
+
+
+def balayage(grille, graine=0, nb_processus=None, cache=None):
+    """
+    Simule toutes les combinaisons d'une grille de paramètres sur un pool de processus.
+
+    Chaque point reçoit sa propre graine, dérivée de `graine` et de la position du point
+    dans la grille: les résultats sont reproductibles quel que soit le nombre de processus.
+
+    Args:
+        * grille (dict):
+            Pour chaque clé de Interface.parametre, et pour la clé "mode", une valeur ou une
+            liste de valeurs. Les clés absentes prennent leur valeur par défaut
+            (PARAMETRE_DEFAUT, et tous les modes pour "mode").
+        * graine (int):
+            Graine maîtresse du balayage.
+        * nb_processus (int):
+            Nombre de processus (par défaut, un par cœur).
+        * cache (CacheResultats):
+            Cache consulté avant de simuler chaque point et complété ensuite (None pour ne pas en utiliser).
+    Returns:
+        * list:
+            Un dictionnaire de résultats par point (voir executer_point), dans l'ordre de la grille.
+    """
+    valeurs = {cle: grille.get(cle, valeur) for cle, valeur in PARAMETRE_DEFAUT.items()}
+    valeurs["mode"] = grille.get("mode", MODES)
+    valeurs = {cle: v if isinstance(v, (list, tuple, range)) else [v] for cle, v in valeurs.items()}
+    points = []
+    for indice, combinaison in enumerate(product(*valeurs.values())):
+        parametre = dict(zip(valeurs.keys(), combinaison))
+        mode = parametre.pop("mode")
+        points.append((parametre, mode, f"{graine}:{indice}", cache))
+    from concurrent.futures import ProcessPoolExecutor
+    nb_processus = nb_processus or os.cpu_count()
+    with ProcessPoolExecutor(max_workers=nb_processus) as pool:
+        return list(pool.map(executer_point, points, chunksize=max(1, len(points) // (4 * nb_processus))))
+
+
+def _executer_fragment(connexion, nom_memoire, sources, buffers, nb_paquet, mode, graine):
+    """
+    Boucle d'un processus de SimulationFragmentee.
+
+    Le fragment simule ses sources et sous-buffers avec un MoteurSimulation dont le buffer
+    principal sert de boîte d'envoi: sa capacité est, à chaque fenêtre, la place accordée
+    par le coordinateur. À la fin de la fenêtre, les tailles des paquets de la boîte d'envoi
+    sont écrites dans la mémoire partagée et le fragment répond par
+    (nombre de paquets envoyés, paquets générés, paquets perdus, simulation finie).
+    Si la simulation du fragment lève une exception, elle est envoyée à la place de la réponse
+    pour que le coordinateur la relance.
+    """
+    from multiprocessing import shared_memory
+    memoire = shared_memory.SharedMemory(name=nom_memoire)
+    tailles = memoire.buf.cast("I")
+    moteur = MoteurSimulation(sources, buffers, 0, nb_paquet, Buffer(0), mode, graine=graine)
+    try:
+        while True:
+            message = connexion.recv()
+            if message is None:
+                break
+            fin, place = message
+            moteur.buffer.capacite = place
+            moteur.executer_jusqu_a(fin)
+            envoi = moteur.buffer.file_attente
+            for k, paquet in enumerate(envoi):
+                tailles[k] = paquet.taille
+            connexion.send((len(envoi), moteur.conter, moteur.nb_paquet_perdu, not moteur.running))
+            moteur.buffer = Buffer(0)
+    except Exception as erreur:
+        try:
+            connexion.send(erreur)
+        except Exception:
+            # Une exception qui ne se sérialise pas est transmise sous forme de texte.
+            connexion.send(RuntimeError(f"fragment: {erreur!r}"))
+    finally:
+        tailles.release()
+        memoire.close()
+
+
+class SimulationFragmentee:
+    """
+    Simulation répartie sur plusieurs processus pour les très grands nombres de sources.
+
+    Les couples source / sous-buffer sont répartis entre `nb_fragments` processus, qui les
+    simulent chacun de leur côté avec un MoteurSimulation. Le buffer principal reste dans le
+    processus coordinateur. Le temps simulé avance par fenêtres de durée `fenetre`:
+        1. le coordinateur fait les transmissions du buffer principal prévues dans la fenêtre,
+           puis partage la place libre entre les fragments au prorata de leur nombre de sous-buffers
+           (le reste de la division allant à chaque fenêtre à un autre fragment);
+        2. chaque fragment simule la fenêtre, ses transferts vers le buffer principal étant
+           limités à la place qui lui a été accordée, et écrit les tailles des paquets
+           transférés dans un bloc de mémoire partagée;
+        3. le coordinateur ajoute ces paquets au buffer principal, en alternant les fragments.
+    Seuls les paquets qui rejoignent le buffer principal passent d'un processus à l'autre.
+
+    C'est une approximation du modèle de MoteurSimulation: dans une fenêtre, les départs
+    du buffer principal précèdent les arrivées, et le mode "la plus pleine" choisit le
+    sous-buffer le plus plein de chaque fragment. Pour que le buffer principal puisse
+    recevoir pendant une fenêtre plus de paquets qu'il n'en transmet, la fenêtre est
+    raccourcie si besoin à la moitié de capacite_buffer / (taux_transmission * taille_max_paquet),
+    le temps de vider un buffer plein de paquets de taille maximale. Les résultats concordent alors
+    statistiquement avec une simulation en un seul processus (voir verifier_fragmentation
+    dans benchmark.py), sauf en mode "la plus pleine" avec des sous-buffers d'un ou deux paquets:
+    un transfert y est perdu quand le fragment n'a aucun paquet alors qu'un autre en a.
+
+    Args:
+        * parametre (dict):
+            Les paramètres de simulation, avec les mêmes clés que Interface.parametre.
+        * mode (str):
+            "chacun son tour", "aléatoire" ou "la plus pleine".
+        * nb_fragments (int):
+            Nombre de processus (par défaut, un par cœur).
+        * graine (int ou str):
+            Graine maîtresse, comme pour creer_composants.
+        * fenetre (float):
+            Durée simulée maximale d'une fenêtre.
+
+    Méthodes:
+        * run() -> dict:
+            Exécute la simulation et renvoie les mêmes compteurs que MoteurSimulation.resultats.
+    """
+    def __init__(self, parametre, mode, nb_fragments=None, graine=None, fenetre=1.0):
+        self.parametre = parametre
+        self.mode = mode
+        self.graine = graine
+        self.fenetre = fenetre
+        if parametre["taux_transmission"]:
+            vidage = parametre["capacite_buffer"] / (2 * parametre["taux_transmission"] * int(parametre["taille_max_paquet"]))
+            if vidage > 0:
+                self.fenetre = min(fenetre, vidage)
+        nb_sous_buffer = int(parametre["nb_buffer"])
+        self.nb_fragments = max(1, min(nb_fragments or os.cpu_count(), nb_sous_buffer))
+        self.sources, self.buffers, self.buffer = creer_composants(parametre, nb_sous_buffer, graine)
+
+    def run(self):
+        from multiprocessing import Pipe, Process, shared_memory
+        N = len(self.buffers)
+        bornes = [N * f // self.nb_fragments for f in range(self.nb_fragments + 1)]
+        tailles_fragments = [bornes[f + 1] - bornes[f] for f in range(self.nb_fragments)]
+        fragments = []
+        try:
+            for f in range(self.nb_fragments):
+                # Un fragment fait au plus un transfert par sous-buffer et par unité de temps.
+                nb_max = ceil(tailles_fragments[f] * self.fenetre) + 2
+                memoire = shared_memory.SharedMemory(create=True, size=4 * nb_max)
+                connexion, connexion_fragment = Pipe()
+                processus = Process(target=_executer_fragment, daemon=True, args=(
+                    connexion_fragment, memoire.name, self.sources[bornes[f]:bornes[f + 1]], self.buffers[bornes[f]:bornes[f + 1]],
+                    self.parametre["nb_paquet"], self.mode, None if self.graine is None else f"{self.graine}:{f}"
+                ))
+                processus.start()
+                fragments.append((processus, connexion, memoire))
+            return self._coordonner(fragments, tailles_fragments)
+        finally:
+            # Chaque fragment est arrêté à part: un fragment déjà terminé (tube fermé) ne doit ni
+            # masquer l'exception en cours ni empêcher de libérer la mémoire partagée des autres.
+            for processus, connexion, memoire in fragments:
+                try:
+                    try:
+                        connexion.send(None)
+                    except OSError:
+                        pass
+                    connexion.close()
+                    processus.join()
+                finally:
+                    memoire.close()
+                    memoire.unlink()
+
+    def _coordonner(self, fragments, tailles_fragments):
+        N = len(self.buffers)
+        taux_transmission = self.parametre["taux_transmission"]
+        periode = 1 / taux_transmission if taux_transmission else float("inf")
+        prochaine_transmission = periode
+        temps = 0.0
+        nb_transmis = 0
+        somme_remplissage = 0.0
+        nb_fenetres = 0
+        finis = [False] * len(fragments)
+        etats = [(0, 0)] * len(fragments)
+        while not all(finis):
+            temps += self.fenetre
+            while prochaine_transmission < temps:
+                paquet, _ = self.buffer.transmettre_paquet()
+                nb_transmis += paquet is not None
+                prochaine_transmission += periode
+            place = int(self.buffer.capacite - self.buffer.occupation)
+            parts = [place * taille // N for taille in tailles_fragments]
+            # Arrondies à l'entier inférieur, les parts laisseraient une petite place libre à jamais.
+            parts[nb_fenetres % len(parts)] += place - sum(parts)
+            for (_, connexion, _), part in zip(fragments, parts):
+                connexion.send((temps, part))
+            envois = []
+            for f, (_, connexion, memoire) in enumerate(fragments):
+                reponse = connexion.recv()
+                if isinstance(reponse, BaseException):
+                    raise reponse
+                nb_envoyes, conter, nb_perdus, finis[f] = reponse
+                etats[f] = (conter, nb_perdus)
+                envois.append(memoire.buf.cast("I")[:nb_envoyes].tolist())
+            for k in range(max(map(len, envois), default=0)):
+                for envoi in envois:
+                    if k < len(envoi):
+                        self.buffer += Paquet(envoi[k])
+            somme_remplissage += self.buffer.pourcentage_rempli()
+            nb_fenetres += 1
+        nb_paquet_genere = sum(conter for conter, _ in etats)
+        nb_paquet_perdu = sum(nb_perdus for _, nb_perdus in etats)
+        return {
+            "temps": temps,
+            "nb_paquet_genere": nb_paquet_genere,
+            "nb_paquet_perdu": nb_paquet_perdu,
+            "nb_transmis": nb_transmis,
+            "pourcentage_perte": nb_paquet_perdu / nb_paquet_genere * 100 if nb_paquet_genere != 0 else 0,
+            "pourcentage_buffer": self.buffer.pourcentage_rempli(),
+            "remplissage_moyen": somme_remplissage / nb_fenetres if nb_fenetres else 0,
+        }
+
+
+class EclatementMultiniveau:
+    """
+    Estimation des très faibles taux de perte par éclatement multiniveau (méthode RESTART).
+
+    Une simulation ordinaire devrait générer des milliards de paquets pour observer une seule
+    perte quand le taux de perte est de l'ordre de 1e-9. Ici, la fonction d'importance est le
+    remplissage du sous-buffer le plus plein (en %), découpé par des seuils croissants. Chaque
+    fois qu'une trajectoire franchit le seuil k vers le haut, son état est copié
+    (MoteurSimulation.variante, avec de nouveaux générateurs aléatoires) et nb_copies[k] - 1
+    essais repartent de cet état; un essai est abandonné dès qu'il redescend sous le seuil
+    qui l'a créé. Une perte survenue au-dessus des seuils 1..k compte pour
+    1 / (nb_copies[1] * ... * nb_copies[k]): l'estimateur du taux de perte reste sans biais,
+    mais les zones proches du débordement sont explorées bien plus souvent.
+
+    L'erreur relative reste bornée si chaque nb_copies[k] est de l'ordre de l'inverse de la
+    probabilité de passer du seuil k au seuil k + 1 (voir "probabilites_niveaux" dans les
+    résultats, à estimer par un premier essai avec de petits nb_copies). Des nb_copies trop
+    grands font exploser le nombre d'essais.
+
+    La variance de l'estimateur est estimée à partir de nb_replications répétitions
+    indépendantes, qui partent toutes de l'état du moteur donné, chacune avec nb_paquet
+    paquets par source sur sa trajectoire principale. Les pertes ne sont rares que si les
+    sources arrivent moins vite que les sous-buffers ne se vident (lambda_param < 1 avec un
+    transfert par sous-buffer et par unité de temps): le moteur est donc construit par
+    l'appelant, avec ses propres sources, plutôt qu'à partir de creer_composants.
+
+    Args:
+        * moteur (MoteurSimulation):
+            Le moteur à simuler, qui n'est pas modifié (sans trace de paquets).
+        * seuils (list):
+            Seuils de remplissage du sous-buffer le plus plein, en %.
+        * nb_copies (int ou list):
+            Nombre de copies à chaque franchissement de seuil (un nombre par seuil, ou le même pour tous).
+        * nb_replications (int):
+            Nombre de répétitions indépendantes (au moins 2).
+        * graine (int ou str):
+            Graine des générateurs aléatoires des répétitions et des essais (None pour une graine imprévisible).
+
+    Méthodes:
+        * run() -> dict:
+            Exécute les répétitions et renvoie l'estimation de la probabilité de perte d'un paquet
+            ("probabilite_perte", et "pourcentage_perte" en %), sa variance ("variance"), son erreur
+            relative ("erreur_relative"), le nombre total de paquets générés par toutes les trajectoires
+            ("nb_arrivees_simulees"), la variance qu'aurait une simulation ordinaire du même nombre de
+            paquets ("variance_brute") et, pour chaque seuil, la proportion des essais partis de ce seuil
+            qui ont atteint le suivant (ou une perte pour le dernier seuil) ("probabilites_niveaux").
+    """
+    def __init__(self, moteur, seuils=(50, 75, 90), nb_copies=5, nb_replications=10, graine=None):
+        self.moteur = moteur
+        self.seuils = sorted(seuils)
+        self.nb_copies = list(nb_copies) if isinstance(nb_copies, (list, tuple)) else [nb_copies] * len(self.seuils)
+        if len(self.nb_copies) != len(self.seuils):
+            raise ValueError("il faut un nombre de copies par seuil")
+        # poids[k]: poids d'une trajectoire au-dessus des seuils 1..k.
+        self.poids = [1.0]
+        for nb in self.nb_copies:
+            self.poids.append(self.poids[-1] / max(1, int(nb)))
+        self.nb_replications = max(2, int(nb_replications))
+        self.rng = random.Random(None if graine is None else f"{graine}:eclatement")
+
+    def _niveau(self, moteur):
+        remplissage = moteur.remplissage
+        return bisect_right(self.seuils, remplissage.cles[remplissage.maximum()][0])
+
+    def _explorer(self, moteur, niveau, courant):
+        # Suit une trajectoire créée au seuil `niveau` (0 pour la trajectoire principale)
+        # jusqu'à la fin de la simulation ou jusqu'à ce qu'elle redescende sous ce seuil.
+        debut = moteur.conter
+        atteint = courant
+        while True:
+            k = self._niveau(moteur)
+            if k < niveau:
+                break
+            atteint = max(atteint, k)
+            while courant < k:
+                courant += 1
+                for _ in range(int(self.nb_copies[courant - 1]) - 1):
+                    self._explorer(moteur.variante(graine=self.rng.getrandbits(64)), courant, courant)
+            courant = k
+            perdus = moteur.nb_paquet_perdu
+            continuer = moteur.etape()
+            if moteur.nb_paquet_perdu > perdus:
+                self._pertes += (moteur.nb_paquet_perdu - perdus) * self.poids[courant]
+                # Au-dessus du dernier seuil, le niveau suivant est la perte elle-même.
+                atteint = len(self.seuils) + 1
+            if not continuer:
+                break
+        self._nb_arrivees += moteur.conter - debut
+        if niveau:
+            self._essais[niveau - 1] += 1
+            self._reussites[niveau - 1] += atteint > niveau
+
+    def run(self):
+        estimations = []
+        self._nb_arrivees = 0
+        self._essais = [0] * len(self.seuils)
+        self._reussites = [0] * len(self.seuils)
+        for _ in range(self.nb_replications):
+            moteur = self.moteur.variante(graine=self.rng.getrandbits(64))
+            self._pertes = 0.0
+            self._explorer(moteur, 0, 0)
+            # Seules les arrivées simulées par la répétition comptent, pas celles déjà faites par self.moteur.
+            nb_arrivees = moteur.conter - self.moteur.conter
+            estimations.append(self._pertes / nb_arrivees if nb_arrivees else 0)
+
+        n = len(estimations)
+        probabilite = sum(estimations) / n
+        variance = sum((e - probabilite) ** 2 for e in estimations) / (n - 1) / n
+        return {
+            "probabilite_perte": probabilite,
+            "pourcentage_perte": 100 * probabilite,
+            "variance": variance,
+            "erreur_relative": variance ** 0.5 / probabilite if probabilite else float("inf"),
+            "nb_replications": n,
+            "nb_arrivees_simulees": self._nb_arrivees,
+            "variance_brute": probabilite * (1 - probabilite) / max(1, self._nb_arrivees),
+            "probabilites_niveaux": [reussites / essais if essais else 0 for essais, reussites in zip(self._essais, self._reussites)],
+        }
+
+
+def perte_mm1k(rho, K):
+    """
+    Probabilité de blocage d'une file M/M/1/K.
+
+    Args:
+        * rho (float):
+            Charge de la file (taux d'arrivée / taux de service).
+        * K (int):
+            Nombre maximal de paquets dans la file.
+    Returns:
+        * float:
+            La probabilité qu'un paquet arrivant trouve la file pleine.
+    """
+    if rho <= 0:
+        return 0.0
+    if abs(rho - 1) < 1e-9:
+        return 1 / (K + 1)
+    if rho > 1:
+        # Forme équivalente qui évite de calculer rho ** K pour les grandes charges.
+        return (1 - 1 / rho) / (1 - (1 / rho) ** (K + 1))
+    return (1 - rho) * rho ** K / (1 - rho ** (K + 1))
+
+
+def longueur_mm1k(rho, K):
+    """
+    Nombre moyen de paquets dans une file M/M/1/K de charge rho.
+    """
+    # Probabilités stationnaires proportionnelles à rho ** n, calculées relativement à l'état le plus probable.
+    poids = [rho ** (n - K) if rho > 1 else rho ** n for n in range(K + 1)]
+    return sum(n * p for n, p in enumerate(poids)) / sum(poids)
+
+
+def estimation_analytique(lambdas, capacites, taille_max_paquet, capacite_buffer, taux_transmission, iterations=100):
+    """
+    Estime en quelques microsecondes le taux de perte de la simulation avec des files M/M/1/K.
+
+    Chaque sous-buffer i est vu comme une file M/M/1/K d'arrivées de taux lambdas[i],
+    pouvant contenir capacites[i] / E[taille] paquets (tailles uniformes de 1 à
+    taille_max_paquet), servie à raison d'un transfert par unité de temps (il y a autant
+    de transferts par unité de temps que de sous-buffers). Le buffer principal est une
+    file M/M/1/K servie au taux taux_transmission et alimentée par les tentatives de transfert
+    des sous-buffers non vides (leur débit divisé par 1 - blocage, puisque les tentatives
+    refusées sont retentées). Un transfert vers un buffer principal plein est refusé: le
+    service des sous-buffers est donc ralenti d'un facteur (1 - blocage du buffer principal),
+    ce qui donne un point fixe calculé par itérations successives. Un taux_transmission nul
+    rend la charge du buffer principal infinie: il finit plein et bloque tous les transferts.
+
+    Le buffer principal ne transmet pas plus de taux_transmission paquets par unité de temps:
+    le pourcentage de perte estimé n'est jamais inférieur à 1 - taux_transmission / sum(lambdas).
+
+    Args:
+        * lambdas (list):
+            Taux d'arrivée de chaque source.
+        * capacites (list):
+            Capacité de chaque sous-buffer.
+        * taille_max_paquet (int):
+            Taille maximale des paquets.
+        * capacite_buffer (int):
+            Capacité du buffer principal.
+        * taux_transmission (float):
+            Nombre de paquets transmis par le buffer principal par unité de temps.
+        * iterations (int):
+            Nombre maximal d'itérations du point fixe.
+    Returns:
+        * dict:
+            La probabilité de perte de chaque sous-buffer ("perte_sous_buffers"), la probabilité
+            de blocage du buffer principal ("blocage_buffer"), son remplissage estimé en pourcentage
+            ("remplissage_buffer") et le pourcentage de paquets perdus ("pourcentage_perte").
+    """
+    taille_moyenne = (1 + taille_max_paquet) / 2
+    K_sous = [max(1, int(capacite // taille_moyenne)) for capacite in capacites]
+    K = max(1, int(capacite_buffer // taille_moyenne))
+    blocage = 0.0
+    for _ in range(iterations):
+        service = max(1e-12, 1 - blocage)
+        pertes = [perte_mm1k(lambda_i / service, k) for lambda_i, k in zip(lambdas, K_sous)]
+        debit = sum(lambda_i * (1 - perte) for lambda_i, perte in zip(lambdas, pertes))
+        # Le débit accepté est déjà réduit par le blocage: la charge se calcule sur les tentatives.
+        tentatives = debit / service
+        charge = tentatives / taux_transmission if taux_transmission else (float("inf") if tentatives else 0.0)
+        nouveau = perte_mm1k(charge, K)
+        if abs(nouveau - blocage) < 1e-9:
+            break
+        # Relaxation pour éviter les oscillations du point fixe quand le buffer principal sature.
+        blocage = (blocage + nouveau) / 2
+    total = sum(lambdas)
+    pourcentage_perte = sum(l * p for l, p in zip(lambdas, pertes)) / total * 100 if total else 0
+    if total:
+        # Borne de débit: au plus taux_transmission paquets sortent du système par unité de temps.
+        pourcentage_perte = max(pourcentage_perte, (1 - taux_transmission / total) * 100)
+    return {
+        "perte_sous_buffers": pertes,
+        "blocage_buffer": blocage,
+        "remplissage_buffer": min(100.0, longueur_mm1k(charge, K) * taille_moyenne / capacite_buffer * 100),
+        "pourcentage_perte": pourcentage_perte,
+    }
+
+
+class CarteRemplissage:
+    """
+    Vue compacte du remplissage d'un grand nombre de sous-buffers.
+
+    Chaque sous-buffer est une cellule carrée d'une seule image (tk.PhotoImage) posée sur
+    le canevas, colorée du vert (vide) au rouge (plein): le nombre d'éléments du canevas
+    ne dépend pas du nombre de sous-buffers. Le remplissage est ramené à `niveaux` paliers
+    et seules les cellules dont le palier a changé depuis la dernière image sont repeintes.
+
+    Args:
+        * canvas (tk.Canvas):
+            Le canevas sur lequel dessiner.
+        * nb_cellules (int):
+            Nombre de sous-buffers représentés.
+        * colonnes (int):
+            Nombre de cellules par ligne.
+        * taille_cellule (int):
+            Côté d'une cellule en pixels.
+
+    Méthodes:
+        * mettre_a_jour(valeurs) -> None:
+            Repeint les cellules dont le pourcentage de remplissage a changé de palier.
+        * zoomer(facteur) -> None:
+            Multiplie la taille des cellules par `facteur` (entre 1 et 40 pixels) et redessine la carte.
+    """
+    niveaux = 32
+    palette = [
+        "#%02x%02x00" % (min(255, 2 * 255 * k // 31), min(255, 2 * 255 * (31 - k) // 31))
+        for k in range(32)
+    ]
+
+    def __init__(self, canvas, nb_cellules, colonnes=50, taille_cellule=8):
+        self.canvas = canvas
+        self.nb_cellules = nb_cellules
+        self.colonnes = colonnes
+        self.taille_cellule = taille_cellule
+        self.canvas.create_text(10, 10, text="Remplissage des sous buffers", anchor="nw")
+        self.item = None
+        self.valeurs = [0] * nb_cellules
+        self._creer_image()
+
+    def _creer_image(self):
+        lignes = -(-self.nb_cellules // self.colonnes)
+        self.image = tk.PhotoImage(width=self.colonnes * self.taille_cellule, height=lignes * self.taille_cellule)
+        if self.item is None:
+            self.item = self.canvas.create_image(10, 30, image=self.image, anchor="nw")
+        else:
+            self.canvas.itemconfig(self.item, image=self.image)
+        self.canvas.configure(scrollregion=self.canvas.bbox("all"))
+        self.niveaux_affiches = [None] * self.nb_cellules
+        self.mettre_a_jour(self.valeurs)
+
+    def mettre_a_jour(self, valeurs):
+        self.valeurs = valeurs
+        t = self.taille_cellule
+        for i, valeur in enumerate(valeurs):
+            niveau = min(self.niveaux - 1, int(valeur * self.niveaux / 100))
+            if niveau != self.niveaux_affiches[i]:
+                self.niveaux_affiches[i] = niveau
+                x, y = (i % self.colonnes) * t, (i // self.colonnes) * t
+                self.image.put(self.palette[niveau], to=(x, y, x + t, y + t))
+
+    def zoomer(self, facteur):
+        taille = max(1, min(40, round(self.taille_cellule * facteur)))
+        if taille != self.taille_cellule:
+            self.taille_cellule = taille
+            self._creer_image()
+
+
 class Interface():
     """
     Représente l'interface utilisateur pour une simulation de réseau.
@@ -169,8 +2606,16 @@ class Interface():
                 * "nb_paquet" : Nombre total de paquets à générer (int).
                 * "nb_buffer" : Nombre de sous-buffers (int).
                 * "capacite_sous_buffer" : Capacité de chaque sous-buffer (int).
+                * "precision" : Demi-largeur visée pour l'intervalle de confiance du taux de perte,
+                  en points de pourcentage (0 pour simuler exactement nb_paquet paquets par source).
         * mode_ (int): Index de sélection courant pour le mode de simulation (0, 1 ou 2).
+        * periode_affichage (int): Intervalle en millisecondes entre deux images de la simulation.
+        * seuil_carte (int): Au-delà de ce nombre de sous-buffers, ils sont affichés sous forme de carte
+            de remplissage (CarteRemplissage) au lieu d'être dessinés un par un.
         * liste_mode (list): Liste des modes de simulation disponibles (chaînes de caractères).
+        * cache (CacheResultats): Le cache des résultats des simulations lancées avec une graine.
+        * profileur (Profileur): Le profileur de la dernière simulation, si la case "Profiler la simulation"
+            était cochée à son lancement (None sinon).
         * widgets (méthode): Crée et organise les widgets de l'interface.
 
     Méthodes:
@@ -180,12 +2625,27 @@ class Interface():
 
         * representation() -> None:
             Dessine la représentation visuelle initiale des buffers en fonction
-            des paramètres de simulation actuels.
+            des paramètres de simulation actuels (une CarteRemplissage défilable et zoomable
+            si les sous-buffers sont plus de seuil_carte).
 
         * demarrer_sim() -> None:
             Lance le thread de simulation, récupère les valeurs des paramètres saisis par l'utilisateur,
             crée des objets sources et buffers, et initialise le thread de simulation
-            avec tous les composants et paramètres nécessaires.
+            avec tous les composants et paramètres nécessaires, puis la boucle d'affichage.
+            Avec une graine, la simulation est reproductible et passe par le cache de résultats.
+
+        * lancer_simulation(taux_transmission, nb_paquet, mode, moteur=None, precision=0, graine=None, cle=None) -> None:
+            Affiche l'estimation analytique, prépare le canevas et lance le thread de simulation
+            sur self.sources, self.buffers et self.buffer (ou sur un moteur déjà existant),
+            arrêté à la précision demandée si elle est non nulle. Si la clé `cle` est donnée, les
+            résultats sont lus dans self.cache ou y sont ajoutés.
+
+        * sauvegarder_etat() -> None:
+            Arrête la simulation en cours et enregistre son état dans un fichier choisi par l'utilisateur
+            (sauf si ses résultats ont été lus dans le cache, le moteur n'ayant alors pas tourné).
+
+        * reprendre_sauvegarde() -> None:
+            Recharge une simulation sauvegardée et la poursuit.
 
         * mode() -> None:
             Parcourt les modes de simulation disponibles et met à jour l'étiquette du mode en conséquence.
@@ -193,14 +2653,41 @@ class Interface():
         * stop_sim() -> None:
             Arrête en toute sécurité le thread de simulation en cours s'il existe.
 
-        * compteur_paquet() -> None:
+        * apercu_estimation() -> None:
+            Affiche, sans lancer de simulation, le taux de perte donné par estimation_analytique
+            pour les paramètres saisis.
+
+        * exporter_metriques() -> None:
+            Une fois la simulation finie, enregistre ses métriques dans un fichier CSV ou .npy choisi par l'utilisateur.
+
+        * compteur_paquet(instantane) -> None:
             Met à jour l'étiquette affichant le nombre restant de paquets à générer.
 
-        * rafraichissement_barre_chargement() -> None:
+        * rafraichissement_barre_chargement(instantane) -> None:
             Met à jour la barre de progression pour refléter le pourcentage d'utilisation actuel du buffer.
 
-        * rafraichissement_label_paquet_perdu() -> None:
-            Calcule et met à jour l'étiquette affichant le pourcentage de perte de paquets.
+        * rafraichissement_label_paquet_perdu(instantane) -> None:
+            Met à jour l'étiquette affichant le pourcentage de perte de paquets (avec son intervalle
+            de confiance si une précision est demandée) et, en fin de simulation, l'écart avec
+            l'estimation analytique.
+
+        * rafraichissement_profil() -> None:
+            Affiche dans le panneau de profilage les phases les plus coûteuses (nombre d'appels et temps propre).
+
+        * exporter_profil() -> None:
+            Enregistre le profil de la dernière simulation profilée en JSON ou au format flamegraph (.folded).
+
+        * rafraichir_affichage(sim_thread) -> None:
+            Appelée toutes les periode_affichage millisecondes par root.after: dessine le plus récent
+            des instantanés publiés par la simulation (les intermédiaires sont ignorés), en chronométrant
+            le dessin si la simulation est profilée.
+
+        * dessiner(instantane) -> None:
+            Met à jour les étiquettes, le remplissage des sous-buffers qui a changé et l'animation
+            des paquets transmis au buffer principal.
+
+        * observateur_moteur(moteur) -> None:
+            Rafraîchit l'affichage à partir d'un MoteurSimulation auquel l'interface est abonnée.
     """
     def __init__(self, master):
         """
@@ -209,18 +2696,14 @@ class Interface():
         Args:
             * maitre (tk.Tk): La fenêtre principale de l'application Tkinter.
         """
+        charger_tkinter()
         self.master = master
-        self.parametre = {
-            "lambda_param": 1,
-            "taille_max_paquet": 1,
-            "capacite_buffer": 1,
-            "taux_transmission": 1,
-            "nb_buffer": 1,
-            "nb_paquet": 50,
-            "capacite_sous_buffer": 1
-        }
+        self.parametre = dict(PARAMETRE_DEFAUT)
+        self.cache = CacheResultats()
         self.mode_ = 0
-        self.liste_mode = ["chacun son tour", "aléatoire", "la plus pleine"]
+        self.liste_mode = list(MODES)
+        self.periode_affichage = 50
+        self.seuil_carte = 8
         self.widgets()
 
 
@@ -242,9 +2725,23 @@ class Interface():
             # fonction intégrée qui permet d'accéder dynamiquement à un attribut d'un objet
             # en utilisant son nom sous forme de chaîne de caractères.
             getattr(self, f"saisie_{entries[i]}").grid(row=i, column=1)
+        tk.Label(self.master, text="Précision de la perte (± %, 0 = aucune):").grid(row=0, column=2)
+        self.saisie_precision = tk.Entry(self.master, textvariable=tk.StringVar(value=self.parametre["precision"]))
+        self.saisie_precision.grid(row=0, column=3)
+        self.profiler = tk.BooleanVar(value=False)
+        tk.Checkbutton(self.master, text="Profiler la simulation", variable=self.profiler).grid(row=1, column=2)
+        tk.Button(self.master, text="Exporter le profil", command=self.exporter_profil).grid(row=1, column=3)
+        self.label_profil = tk.Label(self.master, text="", justify="left", font="TkFixedFont")
+        self.label_profil.grid(row=2, column=2, rowspan=5, columnspan=2, sticky="nw")
+        tk.Label(self.master, text="Graine (vide = aléatoire):").grid(row=0, column=4)
+        self.saisie_graine = tk.Entry(self.master)
+        self.saisie_graine.grid(row=0, column=5)
 
         tk.Button(self.master, text="Démarrer la simulation", command=self.demarrer_sim).grid(row=7, column=0)
         tk.Button(self.master, text="Arrêter la simulation", command=self.stop_sim).grid(row=7, column=1)
+        tk.Button(self.master, text="Exporter les métriques", command=self.exporter_metriques).grid(row=7, column=2)
+        tk.Button(self.master, text="Sauvegarder l'état", command=self.sauvegarder_etat).grid(row=7, column=3)
+        tk.Button(self.master, text="Reprendre une sauvegarde", command=self.reprendre_sauvegarde).grid(row=8, column=3)
 
         self.label_buffer_utilisation = tk.Label(self.master, text="Buffer Utilisation: 0%")
         self.label_buffer_utilisation.grid(row=8, column=0)
@@ -260,10 +2757,32 @@ class Interface():
         self.mode_label = tk.Label(self.master, text=f"Mode : {self.liste_mode[self.mode_]}")
         self.mode_label.grid(row=10, column=1)
 
+        self.label_estimation = tk.Label(self.master, text="Perte estimée: -")
+        self.label_estimation.grid(row=9, column=2)
+        tk.Button(self.master, text="Estimer la perte", command=self.apercu_estimation).grid(row=10, column=2)
+
     def representation(self):
         self.canvas.grid(column=0, row=11, columnspan=10)
+        self.remplissages_affiches = [0] * len(self.buffers)
+        self.transits = deque()
+        self.nb_transferts_affiches = 0
+        self.carte = None
+        if len(self.buffers) > self.seuil_carte:
+            self.carte = CarteRemplissage(self.canvas, len(self.buffers))
+            self.canvas.bind("<MouseWheel>", lambda e: self.canvas.yview_scroll(-1 if e.delta > 0 else 1, "units"))
+            self.canvas.bind("<Button-4>", lambda e: self.canvas.yview_scroll(-1, "units"))
+            self.canvas.bind("<Button-5>", lambda e: self.canvas.yview_scroll(1, "units"))
+            self.canvas.bind("<Control-MouseWheel>", lambda e: self.carte.zoomer(1.25 if e.delta > 0 else 0.8))
+            self.canvas.bind("<Control-Button-4>", lambda e: self.carte.zoomer(1.25))
+            self.canvas.bind("<Control-Button-5>", lambda e: self.carte.zoomer(0.8))
+            return
+        couleur = ['blue', 'green', 'red', 'yellow']
+        self.couleur = [couleur[i % 4] for i in range(len(self.buffers))]
+        self.remplissages = []
         for i in range(len(self.buffers)):
             self.canvas.create_rectangle(10, 200+i*50, 410, 220+i*50, fill="white", outline="black")
+            # Rectangle de remplissage, collé à la sortie du sous buffer et élargi selon son occupation.
+            self.remplissages.append(self.canvas.create_rectangle(410, 200+i*50, 410, 220+i*50, fill=self.couleur[i], width=0))
             self.canvas.create_text(300,  200+i*50-10, text=f"Sous Buffer {i+1}")
             for j in range(20, 400, 20):
                 self.canvas.create_line(10+j, 200+i*50, 10+j, 220+i*50, fill="black", width=1)
@@ -278,37 +2797,180 @@ class Interface():
         self.params = {key: float(getattr(self, f"saisie_{key}").get()) for key in self.parametre.keys()}
         self.nb_sous_buffer = int(self.params.pop("nb_buffer"))
 
-        self.sources = [Source(randint(1, self.params['lambda_param']), self.params['taille_max_paquet']) for _ in range(self.nb_sous_buffer)]
-        self.buffers = [Buffer(randint(1, self.params["capacite_sous_buffer"])) for _ in range(self.nb_sous_buffer)]
-        self.buffer = Buffer(self.params["capacite_buffer"])
-
-        self.sim_thread = SimulationThread(self, self.sources, self.buffers, self.params["taux_transmission"], self.params["nb_paquet"], self.buffer, self.nb_sous_buffer, self.liste_mode[self.mode_])
+        texte = self.saisie_graine.get().strip()
+        graine = None if not texte else (int(texte) if texte.lstrip("-").isdigit() else texte)
+        mode = self.liste_mode[self.mode_]
+        cle = self.cache.cle(dict(self.params, nb_buffer=self.nb_sous_buffer), mode, graine)
+
+        self.sources, self.buffers, self.buffer = creer_composants(self.params, self.nb_sous_buffer, graine)
+        self.lancer_simulation(self.params["taux_transmission"], self.params["nb_paquet"], mode, precision=self.params["precision"], graine=graine, cle=cle)
+
+    def lancer_simulation(self, taux_transmission, nb_paquet, mode, moteur=None, precision=0, graine=None, cle=None):
+        self.estimation = estimation_analytique(
+            [source.lambda_param for source in self.sources], [buffer.capacite for buffer in self.buffers],
+            max((source.taille_max_paquet for source in self.sources), default=1), self.buffer.capacite, taux_transmission
+        )
+        self.label_estimation.config(text=f"Perte estimée: {self.estimation['pourcentage_perte']:.1f}%")
+
+        self.stop_sim()
+        if getattr(self, "canvas", None) is not None:
+            self.canvas.destroy()
+        self.canal = CanalInstantanes()
+        self.profileur = Profileur() if self.profiler.get() else None
+        self.label_profil.config(text="")
+        self.sim_thread = SimulationThread(
+            self, self.sources, self.buffers, taux_transmission, nb_paquet, self.buffer, self.nb_sous_buffer, mode, moteur,
+            # Une simulation profilée est toujours exécutée: lue dans le cache, elle n'aurait pas de profil.
+            precision, self.profileur, graine, self.cache if cle is not None and self.profileur is None else None, cle
+        )
         self.canvas = tk.Canvas(self.master, width=1600, height=600, bg="white") 
+        if getattr(self, "defilement", None) is not None:
+            self.defilement.destroy()
+            self.defilement = None
+        if self.nb_sous_buffer > self.seuil_carte:
+            self.defilement = tk.Scrollbar(self.master, orient="vertical", command=self.canvas.yview)
+            self.defilement.grid(column=10, row=11, sticky="ns")
+            self.canvas.configure(yscrollcommand=self.defilement.set)
         self.representation()
         self.sim_thread.start()
+        self.master.after(self.periode_affichage, self.rafraichir_affichage, self.sim_thread)
+
+    def sauvegarder_etat(self):
+        # Les résultats lus dans le cache ne viennent avec aucun état de moteur à sauvegarder.
+        if not getattr(self, "sim_thread", None) or self.sim_thread.depuis_cache:
+            return
+        # La simulation est arrêtée avant d'être sauvegardée pour que son état ne change plus.
+        self.sim_thread.stop()
+        self.sim_thread.join()
+        chemin = filedialog.asksaveasfilename(defaultextension=".sim", filetypes=[("Sauvegarde de simulation", "*.sim")])
+        if chemin:
+            self.sim_thread.moteur.sauvegarder(chemin)
+
+    def reprendre_sauvegarde(self):
+        chemin = filedialog.askopenfilename(filetypes=[("Sauvegarde de simulation", "*.sim")])
+        if not chemin:
+            return
+        moteur = MoteurSimulation.charger(chemin)
+        self.sources, self.buffers, self.buffer = moteur.sources, moteur.buffers, moteur.buffer
+        self.nb_sous_buffer = len(self.buffers)
+        self.lancer_simulation(moteur.taux_transmission, moteur.nb_paquet, moteur.mode, moteur)
 
     def mode(self):
         self.mode_ = (self.mode_ + 1) % 3
         self.mode_label.config(text=f"mode : {self.liste_mode[self.mode_]}")
 
     def stop_sim(self):
-        if self.sim_thread:
+        if getattr(self, "sim_thread", None):
             self.sim_thread.stop()
 
-    def compteur_paquet(self):
-        self.nb_paquets_restant = int(self.params["nb_paquet"]) - self.sources[0].nb_paquet_genere
+    def apercu_estimation(self):
+        params = {key: float(getattr(self, f"saisie_{key}").get()) for key in self.parametre.keys()}
+        nb_sous_buffer = int(params["nb_buffer"])
+        # Les lambdas et les capacités des sous-buffers seront tirés au hasard: on prend leur valeur moyenne.
+        estimation = estimation_analytique(
+            [(1 + params["lambda_param"]) / 2] * nb_sous_buffer, [(1 + int(params["capacite_sous_buffer"])) / 2] * nb_sous_buffer,
+            params["taille_max_paquet"], params["capacite_buffer"], params["taux_transmission"]
+        )
+        self.label_estimation.config(text=f"Perte estimée: {estimation['pourcentage_perte']:.1f}%")
+
+    def exporter_metriques(self):
+        # Les séries ne sont lues qu'une fois la simulation finie, le thread ne les modifiant plus.
+        if not getattr(self, "sim_thread", None) or self.sim_thread.is_alive():
+            return
+        chemin = filedialog.asksaveasfilename(defaultextension=".csv", filetypes=[("CSV", "*.csv"), ("NumPy", "*.npy")])
+        if chemin.endswith(".npy"):
+            self.sim_thread.metriques.exporter_npy(chemin)
+        elif chemin:
+            self.sim_thread.metriques.exporter_csv(chemin)
+
+    def compteur_paquet(self, instantane):
+        self.nb_paquets_restant = instantane["paquets_restants"]
         self.compteur.config(text=f"Paquets restants: {self.nb_paquets_restant}")
 
-    def rafraichissement_barre_chargement(self):
-        valeur = self.buffer.pourcentage_rempli()
+    def rafraichissement_barre_chargement(self, instantane):
+        valeur = instantane["remplissage_buffer"]
         self.barre_chargement["value"] = valeur
         self.label_buffer_utilisation.config(text=f"Buffer Utilization: {valeur:.1f}%")
 
-    def rafraichissement_label_paquet_perdu(self):
-        nb_paquet_genere = sum(source.nb_paquet_genere for source in self.sources)
-        nb_paquet_perdu = sum(source.nb_paquet_perdu for source in self.sources)
-        valeur = nb_paquet_perdu / nb_paquet_genere * 100 if nb_paquet_genere != 0 else 0
-        self.label_paquet_perdu.config(text=f"Paquet perdu: {valeur:.1f}%")
+    def rafraichissement_label_paquet_perdu(self, instantane):
+        valeur = instantane["pourcentage_perte"]
+        if instantane["intervalle_confiance"] is not None:
+            valeur, demi_largeur = instantane["intervalle_confiance"]["pourcentage_perte"]
+            self.label_paquet_perdu.config(text=f"Paquet perdu: {valeur:.2f}% ± {demi_largeur:.2f}")
+        else:
+            self.label_paquet_perdu.config(text=f"Paquet perdu: {valeur:.1f}%")
+        if instantane["fini"]:
+            ecart = valeur - self.estimation["pourcentage_perte"]
+            self.label_estimation.config(text=f"Perte estimée: {self.estimation['pourcentage_perte']:.1f}% (écart: {ecart:+.1f} points)")
+
+    def rafraichissement_profil(self):
+        rapport = self.profileur.rapport()
+        phases = sorted(rapport["phases"].items(), key=lambda phase: -phase[1]["temps_propre"])
+        lignes = [f"{nom[:24]:24} {phase['nb_appels']:>10} {phase['temps_propre']:>8.3f} s" for nom, phase in phases[:8]]
+        # Percentiles de la durée d'une étape: borne supérieure de la classe de l'histogramme qui les contient.
+        histogramme = rapport["histogramme_etape"]
+        total = sum(histogramme["effectifs"])
+        if total:
+            percentiles = []
+            for q in (50, 90, 99):
+                cumul = 0
+                for b, effectif in enumerate(histogramme["effectifs"]):
+                    cumul += effectif
+                    if cumul * 100 >= q * total:
+                        percentiles.append(f"p{q} < {histogramme['bornes_ns'][b + 1] / 1000:g} µs")
+                        break
+            lignes.append("étape: " + ", ".join(percentiles))
+        self.label_profil.config(text="\n".join(lignes))
+
+    def exporter_profil(self):
+        if getattr(self, "profileur", None) is None:
+            return
+        chemin = filedialog.asksaveasfilename(defaultextension=".json", filetypes=[("JSON", "*.json"), ("Pile repliée (flamegraph)", "*.folded")])
+        if chemin.endswith(".json"):
+            self.profileur.exporter_json(chemin)
+        elif chemin:
+            self.profileur.exporter_flamegraph(chemin)
+
+    def rafraichir_affichage(self, sim_thread):
+        # Une boucle d'affichage par simulation: celle d'une simulation remplacée s'arrête d'elle-même.
+        if sim_thread is not self.sim_thread:
+            return
+        instantane = self.canal.dernier()
+        if instantane is not None:
+            debut = perf_counter_ns()
+            self.dessiner(instantane)
+            if self.profileur is not None:
+                self.profileur.mesurer("dessin", perf_counter_ns() - debut)
+                self.rafraichissement_profil()
+        if sim_thread.is_alive() or instantane is not None:
+            self.master.after(self.periode_affichage, self.rafraichir_affichage, sim_thread)
+
+    def dessiner(self, instantane):
+        self.compteur_paquet(instantane)
+        self.rafraichissement_barre_chargement(instantane)
+        self.rafraichissement_label_paquet_perdu(instantane)
+        if self.carte is not None:
+            self.carte.mettre_a_jour(instantane["remplissage_sous_buffers"])
+            return
+        for i, valeur in enumerate(instantane["remplissage_sous_buffers"]):
+            if valeur != self.remplissages_affiches[i]:
+                self.remplissages_affiches[i] = valeur
+                self.canvas.coords(self.remplissages[i], 410 - 4 * min(valeur, 100), 200+i*50, 410, 220+i*50)
+        # Tous les paquets en transit avancent d'un seul appel grâce à leur tag commun.
+        self.canvas.move("transit", 20, 0)
+        if instantane["nb_transferts"] > self.nb_transferts_affiches:
+            self.nb_transferts_affiches = instantane["nb_transferts"]
+            self.transits.append(self.canvas.create_rectangle(560, 250, 580, 270, fill=self.couleur[instantane["dernier_transfert"]], tags="transit"))
+        if len(self.transits) > 20:
+            self.canvas.delete(self.transits.popleft())
+
+    def observateur_moteur(self, moteur):
+        """
+        Observateur à abonner à un MoteurSimulation (moteur.abonner(interface.observateur_moteur, periode))
+        pour suivre une simulation sans tête depuis l'interface, dans le thread principal.
+        """
+        self.dessiner(moteur.instantane())
+        self.master.update()
 
 
 class SimulationThread(Thread):
@@ -316,12 +2978,13 @@ class SimulationThread(Thread):
     Simule un réseau ou un système de communication, en gérant la génération, la
     transmission et la perte potentielle de paquets de données.
 
-    Cette classe s'exécute en tant que thread distinct et interagit avec une interface
-    utilisateur graphique (GUI) pour visualiser le processus de simulation.
+    Cette classe s'exécute en tant que thread distinct et fait tourner un MoteurSimulation.
+    Elle ne touche jamais à Tkinter: le moteur publie des instantanés de son état dans le
+    CanalInstantanes de l'interface, que le thread principal vient dessiner à cadence fixe.
 
     Args:
         * interface -> objet:
-            L'objet GUI pour la visualisation et les mises à jour des données.
+            L'objet GUI dont le canal (interface.canal) reçoit les instantanés.
         * sources -> liste: 
             Une liste d'objets représentant les sources de paquets.
         * buffers -> liste: 
@@ -329,7 +2992,7 @@ class SimulationThread(Thread):
         * taux_transmission -> float:
             Le taux de transmission du réseau (paquets par unité de temps).
         * nb_paquet -> int:
-            Le nombre total de paquets à simuler.
+            Le nombre de paquets à simuler par source.
         * buffer -> objet:
             Un objet représentant un tampon central pouvant recevoir des paquets.
         * nb_source -> int:
@@ -339,45 +3002,49 @@ class SimulationThread(Thread):
                 - "chacun son tour": Sélectionne chaque buffer a tour de rôle.
                 - "aléatoire" : Sélection aléatoirement un buffer.
                 - "la plus pleine" : Sélectionne le buffer le plus plein.
+        * moteur -> MoteurSimulation:
+            Un moteur existant à poursuivre (par exemple rechargé depuis une sauvegarde),
+            construit sur les mêmes sources et buffers. Par défaut, un nouveau moteur est créé.
+        * precision -> float:
+            Si elle est non nulle, la simulation s'arrête dès que l'intervalle de confiance du
+            taux de perte a cette demi-largeur (en points de pourcentage).
+        * profileur -> Profileur:
+            S'il est donné, chronomètre les phases du moteur (None pour ne rien mesurer).
+        * graine -> int ou str:
+            Graine du mode "aléatoire" du nouveau moteur (None pour une graine imprévisible).
+        * cache -> CacheResultats:
+            Cache où chercher les résultats sous la clé `cle` avant de simuler, et où les ajouter
+            si la simulation va jusqu'au bout (None pour ne pas en utiliser).
+        * cle -> str:
+            Clé de la simulation dans le cache (voir CacheResultats.cle).
 
     Attributs:
-        * running (bool):
-            Indicateur indiquant si la simulation est en cours.
-        * conter (int):
-            Compteur du nombre de paquets simulés.
-        * x2 (int):
-            Variable interne probablement utilisée à des fins d'animation.
-        * paquet (liste):
-            Liste pour stocker les représentations graphiques des paquets.
-        * transmits (liste):
-            Liste pour stocker les représentations graphiques des paquets en transit.
-        * couleur (liste):
-            Liste contenant des noms de couleurs pour la visualisation des paquets.
-        * abscisse (liste):
-            Liste contenant les coordonnées x initiales pour la visualisation des paquets.
+        * moteur (MoteurSimulation):
+            Le moteur qui exécute la simulation.
+        * arret (ArretPrecision):
+            Le critère d'arrêt à la précision demandée (None sans précision).
+        * depuis_cache (bool):
+            Vrai si les résultats ont été lus dans le cache: le moteur n'a alors pas tourné.
+        * metriques (EnregistreurMetriques):
+            Les séries temporelles de la simulation, un enregistrement toutes les nb_source arrivées.
     
     Methods:
-        * show_paquets(abscisse, i) -> None:
-            Gère la représentation visuelle des paquets et leur mouvement simulé.
-            Cette méthode crée des rectangles pour représenter les paquets et anime
-            leur déplacement sur l'interface graphique.
-            Args:
-                * abscisse (liste):
-                    Liste des coordonnées x pour les paquets.
-                * i (int):
-                    Indice de la file d'attente considéré.
-
         * run() -> None:
-            Boucle principale de la simulation, gérant la génération de paquets,
-            leur interaction avec les tampons, la transmission et la perte potentielle.
-            Cette méthode contrôle le déroulement de la simulation jusqu'à ce que le nombre
-            de paquets simulé atteigne la valeur définie dans 'nb_paquet'.
+            Exécute la simulation jusqu'au bout, puis publie un dernier instantané (ou publie directement
+            l'instantané final et reprend les métriques d'une entrée du cache).
+
+        * stop() -> None:
+            Demande l'arrêt de la simulation.
     """
-    def __init__(self, interface, sources, buffers, taux_transmission, nb_paquet, buffer, nb_source, mode):
+    # Budget des métriques en cellules (8 octets chacune): environ 8 Mo quel que soit le nombre de sous-buffers.
+    MAX_CELLULES = 1_000_000
+
+    def __init__(self, interface, sources, buffers, taux_transmission, nb_paquet, buffer, nb_source, mode, moteur=None, precision=0, profileur=None,
+                 graine=None, cache=None, cle=None):
         # un appel à la méthode __init__ de la classe parent (Thread). 
         # Cet appel garantit que la méthode __init__ de la classe parent est exécutée en premier,
         # initialisant tous les attributs ou effectuant les tâches de configuration requises par la classe Thread.
-        super().__init__()
+        super().__init__(daemon=True)
         self.interface = interface
         self.buffers = buffers
         self.sources = sources
@@ -385,125 +3052,192 @@ class SimulationThread(Thread):
         self.taux_transmission = taux_transmission
         self.nb_paquet = nb_paquet
         self.nb_source = nb_source
-        self.running = True
-        self.conter = 0
         self.mode = mode
-        self.x2=550
-        self.paquet=[]
-        self.transmits=[]
-        couleur=['blue','green','red','yellow']
-        self.couleur=[couleur[i % 4] for i in range(len(buffers))]
-        self.abscisse=[410 for _ in range(len(buffers))]
-
-    def show_paquets(self,abscisse,i):
-        if abscisse[i] >= 20:
-            paq=self.interface.canvas.create_rectangle(abscisse[i]-20,200+50*i,abscisse[i],220+50*i,fill=self.couleur[i])
-            paq
-            self.paquet.append(paq)
-            abscisse[i]-=20
-        sleep(0.1)
-        if len(self.paquet)!=0:
-            elem=self.paquet.pop(0)
-            self.transmits.append(elem)
-            if self.x2>=0:
-                self.interface.canvas.move(elem,self.x2,50-i*50)
-                self.x2-=20
-                abscisse[i]+=20
-        if len(self.transmits)>20:
-            self.x2+=20
-            a_supp=self.transmits.pop(0)
-            self.interface.canvas.delete(a_supp)
-            for p in self.transmits:
-                z1, w1, z2, w2 = self.interface.canvas.coords(p)
-                self.interface.canvas.coords(p, z1+20, w1, z1+40, w2)
+        self.moteur = moteur or MoteurSimulation(sources, buffers, taux_transmission, nb_paquet, buffer, mode, graine=graine)
+        self.cache = cache
+        self.cle = cle
+        self.arrete = False
+        self.depuis_cache = False
+        self.moteur.abonner(interface.canal.publier)
+        self.metriques = EnregistreurMetriques(nb_source, mode="decimation", max_cellules=self.MAX_CELLULES)
+        self.moteur.abonner(self.metriques.enregistrer, max(1, nb_source))
+        self.arret = None
+        if precision:
+            self.arret = ArretPrecision(precision)
+            self.arret.attacher(self.moteur)
+        self.profileur = profileur
+        if profileur is not None:
+            profileur.attacher(self.moteur)
 
     def run(self):
-        while self.running:
-            estimation = 0
-            k = 0
-            for source, buffer in zip(self.sources, self.buffers):      
-                paquet = source.generation_paquet()
-                if source.estimation_taux_arrive() > self.taux_transmission:
-                    if buffer.buffer_plein(paquet):
-                        source.nb_paquet_perdu += 1
-                    else:
-                        buffer += paquet
-                else:
-                    estimation += source.estimation_taux_arrive()
+        entree = self.cache.lire(self.cle) if self.cache is not None else None
+        # Une entrée écrite sans interface n'a pas de métriques: la simulation est refaite pour les avoir.
+        if entree is not None and entree["metriques"] is not None:
+            self.metriques = EnregistreurMetriques.depuis_colonnes(entree["metriques"], mode="decimation", max_cellules=self.MAX_CELLULES)
+            self.depuis_cache = True
+            self.interface.canal.deposer(entree["instantane"])
+            return
+        self.moteur.run()
+        self.interface.canal.publier(self.moteur, force=True)
+        if self.cache is not None and not self.arrete:
+            self.cache.ecrire(self.cle, self.moteur.resultats(), self.moteur.instantane(), self.metriques.colonnes())
 
-                if self.mode == "aléatoire":
-                    val=randint(0, len(self.buffers) - 1)
-                    buffer = self.buffers[val]
-                    self.show_paquets(self.abscisse,val)
-                elif self.mode == "la plus pleine":
-                    buffer = max(self.buffers, key=lambda buf: buf.pourcentage_rempli())
-                    c = [z for z in range(len(self.buffers)) if buffer == self.buffers[z]]
-                    self.show_paquets(self.abscisse, c[0])
-                else:
-                    self.show_paquets(self.abscisse, k)
-                if buffer.file_attente:
-                    if not self.buffer.buffer_plein(buffer.file_attente[0]):
-                        paquet_transmit, _ = buffer.transmettre_paquet()
-                        self.buffer += paquet_transmit
-                k += 1
-            if self.buffer and estimation > self.taux_transmission:
-                self.buffer.transmettre_paquet()
-
-            self.conter += 1
-            if self.conter == self.nb_paquet:
-                self.stop()
+    def stop(self):
+        self.arrete = True
+        self.moteur.stop()
 
-            if len(self.transmits)>20:
-                self.x2+=20
-                a_supp=self.transmits.pop(0)
-                self.interface.canvas.delete(a_supp)
-                for p in self.transmits:
-                    z1, w1, z2, w2 = self.interface.canvas.coords(p)
-                    self.interface.canvas.coords(p, z1+20, w1, z1+40, w2)
-            
-            
-            self.interface.compteur_paquet()
-            self.interface.rafraichissement_barre_chargement()
-            self.interface.rafraichissement_label_paquet_perdu()
-            self.interface.master.update()
-            sleep(0.1)
-
-        for buf in self.buffers:
-            while buf.file_attente:
-                transmi, _ = buf.transmettre_paquet()
-                self.buffer += transmi
-                while self.buffer.file_attente:
-                    self.buffer.transmettre_paquet()
-                    self.interface.rafraichissement_barre_chargement()
-                    self.interface.master.update()
-                    sleep(0.1)
-        
-        if len(self.paquet)==0 and len(self.transmits)!=0:
-            while len(self.transmits)!=0:
-                a_supp=self.transmits.pop(0)
-                self.interface.canvas.delete(a_supp)
-                for p in self.transmits:
-                    z1, w1, z2, w2 = self.interface.canvas.coords(p)
-                    self.interface.canvas.coords(p, z1+20, w1, z1+40, w2)
-                sleep(0.1)
-        self.interface.canvas.destroy()
 
-    def stop(self):
-        self.running = False
+def ecrire_jsonl(objet, sortie=None):
+    """
+    Écrit un objet sur une ligne JSON (par défaut sur la sortie standard) et vide le tampon,
+    pour que chaque ligne puisse être lue par un autre programme dès qu'elle est produite.
+    """
+    sortie = sortie or sys.stdout
+    sortie.write(json.dumps(objet, ensure_ascii=False) + "\n")
+    sortie.flush()
+
+
+def executer_sans_interface(parametre, mode, graine=None, progression=0, trace=None, sortie=None, profil=None, cache=None):
+    """
+    Exécute une simulation sans interface graphique et écrit son déroulement au format JSONL.
+
+    Une ligne {"type": "progression", ...} est écrite toutes les `progression` arrivées, avec la
+    date simulée, le nombre de paquets générés, le taux de perte, le remplissage du buffer
+    principal et, si une précision est demandée, l'intervalle de confiance courant. Une ligne
+    {"type": "resultats", ...} termine la sortie avec les paramètres et MoteurSimulation.resultats().
+    Si la simulation est déjà dans le cache, ses résultats sont écrits directement, sans
+    progression, avec "cache": true.
+
+    Args:
+        * parametre (dict):
+            Les paramètres de simulation, avec les mêmes clés que Interface.parametre.
+        * mode (str):
+            "chacun son tour", "aléatoire" ou "la plus pleine".
+        * graine (int ou str):
+            Graine maîtresse, comme pour creer_composants (None pour une graine imprévisible).
+        * progression (int):
+            Nombre d'arrivées entre deux lignes de progression (0 pour n'en écrire aucune).
+        * trace (str):
+            Chemin d'une trace binaire (voir LecteurTrace) dont les arrivées sont rejouées.
+        * sortie (fichier):
+            Fichier texte où écrire (par défaut la sortie standard).
+        * profil (str):
+            S'il est donné, la simulation est profilée (voir Profileur) et le profil est écrit dans
+            ce fichier: en JSON si son nom finit par .json, au format flamegraph sinon.
+        * cache (CacheResultats):
+            Cache consulté avant la simulation et complété ensuite (None pour ne pas en utiliser). Les
+            simulations sans graine ou qui rejouent une trace n'y sont pas mises; une simulation profilée
+            est toujours exécutée.
+    Returns:
+        * dict:
+            Les résultats de la simulation.
+    """
+    cle = cache.cle(parametre, mode, graine) if cache is not None and not trace else None
+    entree = cache.lire(cle) if cle is not None and not profil else None
+    if entree is not None:
+        ecrire_jsonl({"type": "resultats", "parametre": parametre, "mode": mode, "graine": graine, **entree["resultats"], "cache": True}, sortie)
+        return entree["resultats"]
+
+    sources, buffers, buffer = creer_composants(parametre, int(parametre["nb_buffer"]), graine)
+    lecteur = LecteurTrace(trace) if trace else None
+    try:
+        moteur = MoteurSimulation(sources, buffers, parametre["taux_transmission"], parametre["nb_paquet"], buffer, mode, trace=lecteur, graine=graine)
+        if parametre.get("precision"):
+            ArretPrecision(parametre["precision"]).attacher(moteur)
+        if progression:
+            def ecrire_progression(moteur):
+                instantane = moteur.instantane()
+                ecrire_jsonl({
+                    "type": "progression",
+                    "temps": instantane["temps"],
+                    "nb_paquet_genere": moteur.conter,
+                    "pourcentage_perte": instantane["pourcentage_perte"],
+                    "remplissage_buffer": instantane["remplissage_buffer"],
+                    "intervalle_confiance": instantane["intervalle_confiance"],
+                }, sortie)
+            moteur.abonner(ecrire_progression, progression)
+        profileur = Profileur() if profil else None
+        if profileur is not None:
+            profileur.attacher(moteur)
+        resultats = moteur.run()
+    finally:
+        if lecteur is not None:
+            lecteur.fermer()
+    if profileur is not None:
+        if profil.endswith(".json"):
+            profileur.exporter_json(profil)
+        else:
+            profileur.exporter_flamegraph(profil)
+    if cle is not None:
+        cache.ecrire(cle, resultats, moteur.instantane())
+    ecrire_jsonl({"type": "resultats", "parametre": parametre, "mode": mode, "graine": graine, **resultats, "cache": False}, sortie)
+    return resultats
+
+
+def main(arguments=None):
+    """
+    Point d'entrée en ligne de commande.
+
+    Sans argument (ou avec --interface), ouvre l'interface graphique. Sinon, simule sans
+    interface les paramètres lus dans un fichier JSON (--config, mêmes clés que Interface.parametre,
+    plus "mode" et "graine") et/ou donnés en options, qui l'emportent sur le fichier, et écrit
+    la progression et les résultats au format JSONL sur la sortie standard
+    (voir executer_sans_interface). Les simulations avec une graine passent par un CacheResultats
+    (--cache pour changer de dossier, --sans-cache pour s'en passer).
+
+    Exemple:
+        python projet-prog-avancé.py --config point.json --nb_paquet 100000 --graine 3 --progression 10000
+    """
+    parser = argparse.ArgumentParser(description="Simulation de buffers.")
+    parser.add_argument("--interface", action="store_true", help="ouvre l'interface graphique")
+    parser.add_argument("--config", metavar="JSON", help="fichier JSON des paramètres de la simulation")
+    for cle in PARAMETRE_DEFAUT:
+        parser.add_argument(f"--{cle}", type=float)
+    parser.add_argument("--mode", choices=MODES)
+    parser.add_argument("--graine", help="graine maîtresse (par défaut imprévisible)")
+    parser.add_argument("--progression", type=int, default=0, metavar="N", help="une ligne de progression toutes les N arrivées")
+    parser.add_argument("--trace", metavar="FICHIER", help="trace binaire de paquets à rejouer (voir LecteurTrace)")
+    parser.add_argument("--profil", metavar="FICHIER", help="profile la simulation et écrit le profil (JSON si .json, flamegraph sinon)")
+    parser.add_argument("--cache", metavar="DOSSIER", help="dossier du cache de résultats (par défaut ~/.cache/projet-buffer)")
+    parser.add_argument("--sans-cache", action="store_true", help="simule sans consulter ni compléter le cache")
+    arguments = sys.argv[1:] if arguments is None else arguments
+    args = parser.parse_args(arguments)
+
+    if args.interface or not arguments:
+        charger_tkinter()
+        root = tk.Tk()
+        Interface(root)
+        root.mainloop()
+        return 0
+
+    config = {}
+    if args.config:
+        with open(args.config) as fichier:
+            config = json.load(fichier)
+    parametre = {cle: config.get(cle, valeur) for cle, valeur in PARAMETRE_DEFAUT.items()}
+    parametre.update({cle: getattr(args, cle) for cle in PARAMETRE_DEFAUT if getattr(args, cle) is not None})
+    mode = args.mode or config.get("mode", MODES[0])
+    if mode not in MODES:
+        parser.error(f"mode inconnu: {mode}")
+    graine = args.graine if args.graine is not None else config.get("graine")
+    # "3" en option et 3 dans le fichier JSON doivent donner la même simulation.
+    if isinstance(graine, str) and graine.lstrip("-").isdigit():
+        graine = int(graine)
+    cache = None if args.sans_cache else CacheResultats(args.cache)
+    executer_sans_interface(parametre, mode, graine, args.progression, args.trace, profil=args.profil, cache=cache)
+    return 0
 
 
 if __name__ == '__main__':
     """
-    Lance l'interface graphique de la simulation de réseau.
+    Lance la simulation de réseau (voir main).
 
-    Cette fonction crée une instance de la classe `Tk` de la bibliothèque tkinter,
+    Sans argument, cette fonction crée une instance de la classe `Tk` de la bibliothèque tkinter,
     qui sert de base pour l'interface graphique (GUI). Ensuite, elle crée une instance
     de la classe `Interface` définie dans le même module, en lui passant la référence
     à la fenêtre racine (`root`). Cette instance de `Interface` est responsable de
     la création et de la gestion des éléments visuels de l'interface. Enfin, elle
     démarre la boucle principale de l'interface graphique en appelant la méthode `mainloop()`
-    de l'objet `root`.
+    de l'objet `root`. Avec des arguments, la simulation tourne sans interface.
     """
-    root = tk.Tk()
-    Interface(root)
-    root.mainloop()
+    sys.exit(main())